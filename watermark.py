@@ -5,19 +5,110 @@ Photo Watermark Tool
 在图片上添加基于EXIF拍摄时间的水印
 """
 
+import io
 import os
+import functools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 import click
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageColor, ImageDraw, ImageFont
 import piexif
 
 
+FONT_PATHS = (
+    "C:/Windows/Fonts/simhei.ttf",
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/arial.ttf",
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_font(font_path, font_size):
+    """加载字体并缓存，批量处理时每个字号只解析一次 TTF"""
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, font_size)
+        except Exception:
+            pass
+    return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=256)
+def _measure_text(font, text):
+    """测量文本边界框并缓存，同一字体下相同日期文本只测量一次"""
+    return font.getbbox(text)
+
+
+def _read_jpeg_exif_segment(image_path):
+    """只读取 JPEG 文件头部的元数据段，返回 APP1 中的 EXIF 数据
+
+    读到图像数据 (SOS) 前没有 EXIF 时返回 b''；非 JPEG 或结构无法识别时返回 None。
+    """
+    with open(image_path, 'rb') as f:
+        if f.read(2) != b'\xff\xd8':
+            return None
+        while True:
+            header = f.read(4)
+            if len(header) < 4 or header[0] != 0xFF:
+                return None
+            marker = header[1]
+            if marker == 0xFF:  # 填充字节
+                f.seek(-3, os.SEEK_CUR)
+                continue
+            if marker in (0xD9, 0xDA):  # EOI / SOS 之后不再有元数据段
+                return b''
+            length = int.from_bytes(header[2:], 'big')
+            if marker == 0xE1:
+                segment = f.read(length - 2)
+                if segment[:6] == b'Exif\x00\x00':
+                    return segment
+            else:
+                f.seek(length - 2, os.SEEK_CUR)
+
+
+def _output_exif(exif_bytes, size):
+    """整理写入输出文件的EXIF，返回可直接传给 save(exif=...) 的字节串；无法解析时返回 b''
+
+    像素未按 Orientation 旋转，方向重置为 1，水印位置与看到的画面一致；
+    去掉未加水印的内嵌缩略图，像素尺寸改为输出尺寸。
+    """
+    if not exif_bytes:
+        return b''
+    try:
+        exif_data = piexif.load(exif_bytes)
+        exif_data["0th"][piexif.ImageIFD.Orientation] = 1
+        for tag, value in ((piexif.ImageIFD.ImageWidth, size[0]), (piexif.ImageIFD.ImageLength, size[1])):
+            if tag in exif_data["0th"]:
+                exif_data["0th"][tag] = value
+        exif_data["Exif"][piexif.ExifIFD.PixelXDimension] = size[0]
+        exif_data["Exif"][piexif.ExifIFD.PixelYDimension] = size[1]
+        exif_data["1st"] = {}
+        exif_data["thumbnail"] = None
+        return piexif.dump(exif_data)
+    except Exception as e:
+        click.echo(f"警告: 无法写入EXIF信息: {e}", err=True)
+        return b''
+
+
+PREFETCH_COUNT = 4
+
+# 黑色 (alpha=128) 叠加到不透明像素上的结果，与 alpha_composite 的舍入一致；RGB 三通道共用
+SHADE_LUT = [(v * 127 + 127) // 255 for v in range(256)] * 3
+
+
 class PhotoWatermark:
     """图片水印处理类"""
 
-    def __init__(self):
+    def __init__(self, quality=90, optimize=False, max_width=None):
+        self.quality = quality
+        self.max_width = max_width
+        self.optimize = optimize  # Huffman 表优化会使 JPEG 编码耗时成倍增加，默认关闭
         self.supported_formats = ('.jpg', '.jpeg', '.png', '.tiff', '.bmp')
+        # 字体路径只探测一次
+        self.font_path = next((fp for fp in FONT_PATHS if os.path.exists(fp)), None)
 
     def is_supported_image(self, path: Path) -> bool:
         return path.suffix.lower() in self.supported_formats
@@ -25,11 +116,19 @@ class PhotoWatermark:
     def get_exif_date(self, image_path):
         """从图片EXIF信息中提取拍摄时间，返回 YYYY-MM-DD 或 None"""
         try:
-            image = Image.open(image_path)
-            exif_bytes = image.info.get('exif', b'')
-            if not exif_bytes:
+            exif_segment = _read_jpeg_exif_segment(image_path)
+            if exif_segment == b'':
                 return None
-            exif_data = piexif.load(exif_bytes)
+            try:
+                # JPEG 只解析文件头中的 APP1 段，TIFF 直接由 piexif 读取，均不经过 Pillow
+                exif_data = piexif.load(exif_segment or str(image_path))
+            except piexif.InvalidImageDataError:
+                # PNG 等格式的 EXIF 仍由 Pillow 从文件头中取出
+                with Image.open(image_path) as image:
+                    exif_bytes = image.info.get('exif', b'')
+                if not exif_bytes:
+                    return None
+                exif_data = piexif.load(exif_bytes)
 
             date_fields = [
                 piexif.ExifIFD.DateTimeOriginal,  # 拍摄时间
@@ -73,74 +172,106 @@ class PhotoWatermark:
         }
         return positions.get(position, positions['bottom-right'])
 
-    def add_watermark(self, image_path, font_size, color, position, output_dir):
-        """为单张图片添加水印，返回是否成功"""
+    def add_watermark(self, image_path, font_size, color, position, output_dir, date_text=None, image_data=None):
+        """为单张图片添加水印，返回是否成功
+
+        date_text 为预先读取的拍摄日期，image_data 为预先读入内存的文件内容。
+        """
         try:
-            date_text = self.get_exif_date(image_path)
+            if date_text is None:
+                date_text = self.get_exif_date(image_path)
             if not date_text:
                 click.echo(f"跳过 {image_path.name}: 无EXIF拍摄时间")
                 return False
-            image = Image.open(image_path)
+            image = Image.open(io.BytesIO(image_data) if image_data is not None else image_path)
+            if self.max_width and image.width > self.max_width:
+                target_size = (self.max_width, max(1, round(image.height * self.max_width / image.width)))
+                # JPEG 在解码阶段直接按 1/2、1/4、1/8 缩小，跳过用不到的像素
+                image.draft('RGB', target_size)
+                image.thumbnail(target_size, Image.Resampling.LANCZOS)
             if image.mode != 'RGB':
                 image = image.convert('RGB')
-            draw = ImageDraw.Draw(image)
-            try:
-                font_paths = [
-                    "C:/Windows/Fonts/simhei.ttf",
-                    "C:/Windows/Fonts/msyh.ttc",
-                    "C:/Windows/Fonts/arial.ttf",
-                ]
-                font = None
-                for fp in font_paths:
-                    if os.path.exists(fp):
-                        font = ImageFont.truetype(fp, font_size)
-                        break
-                if font is None:
-                    font = ImageFont.load_default()
-            except Exception:
-                font = ImageFont.load_default()
-            bbox = draw.textbbox((0, 0), date_text, font=font)
+            font = _load_font(self.font_path, font_size)
+            bbox = _measure_text(font, date_text)
             text_width = bbox[2] - bbox[0]
             text_height = bbox[3] - bbox[1]
             x, y = self.get_position_coordinates(image.size, (text_width, text_height), position)
-            overlay = Image.new('RGBA', image.size, (0, 0, 0, 0))
-            overlay_draw = ImageDraw.Draw(overlay)
+            # 半透明黑色背景框: 只对框内像素按查找表压暗，全程保持 RGB
             padding = 5
-            overlay_draw.rectangle(
-                [x - padding, y - padding, x + text_width + padding, y + text_height + padding],
-                fill=(0, 0, 0, 128)
-            )
-            image = Image.alpha_composite(image.convert('RGBA'), overlay).convert('RGB')
+            box = (x - padding, y - padding, x + text_width + padding + 1, y + text_height + padding + 1)
+            roi = image.crop(box).point(SHADE_LUT)
+            image.paste(roi, box)
             draw = ImageDraw.Draw(image)
             draw.text((x, y), date_text, fill=color, font=font)
             output_path = output_dir / image_path.name
-            image.save(output_path, quality=95, optimize=True)
+            # 原图的 EXIF 整理后写回，保留拍摄时间等信息
+            image.save(output_path, quality=self.quality, optimize=self.optimize,
+                       subsampling=2, progressive=False,
+                       exif=_output_exif(image.info.get('exif', b''), image.size))
             click.echo(f"已处理: {image_path.name}")
             return True
         except Exception as e:
             click.echo(f"处理 {image_path} 时出错: {e}", err=True)
             return False
 
-    def process_directory(self, input_dir, font_size, color, position):
-        """处理目录中的所有图片"""
+    def process_directory(self, input_dir, font_size, color, position, workers=None, executor='process'):
+        """处理目录中的所有图片，executor 为 'thread' 或 'process'"""
         input_path = Path(input_dir)
         if not input_path.exists():
             click.echo(f"错误: 目录 {input_dir} 不存在")
             return
         output_dir = input_path / f"{input_path.name}_watermark"
         output_dir.mkdir(exist_ok=True)
-        image_files = []
-        for ext in self.supported_formats:
-            image_files.extend(input_path.glob(f"*{ext}"))
-            image_files.extend(input_path.glob(f"*{ext.upper()}"))
+        # 单次遍历目录，按小写后缀过滤所有支持的格式
+        with os.scandir(input_path) as it:
+            image_files = [Path(e.path) for e in it
+                           if e.is_file() and e.name.lower().endswith(self.supported_formats)]
         if not image_files:
             click.echo(f"在目录 {input_dir} 中没有找到支持的图片文件")
             return
         click.echo(f"找到 {len(image_files)} 个图片文件，开始处理...")
-        success = 0
+        # 先只读文件头筛掉没有拍摄时间的图片，再分发给工作者解码
+        dated_files, dates = [], []
         for img in image_files:
-            if self.add_watermark(img, font_size, color, position, output_dir):
-                success += 1
+            date_text = self.get_exif_date(img)
+            if date_text:
+                dated_files.append(img)
+                dates.append(date_text)
+            else:
+                click.echo(f"跳过 {img.name}: 无EXIF拍摄时间")
+        workers = workers or os.cpu_count()
+        success = 0
+        if workers == 1:
+            # 单个工作者时由后台线程预读后续文件，使磁盘读取与解码/编码重叠
+            with ThreadPoolExecutor(max_workers=2) as reader:
+                pending = deque(reader.submit(img.read_bytes) for img in dated_files[:PREFETCH_COUNT])
+                for i, (img, date_text) in enumerate(zip(dated_files, dates)):
+                    future = pending.popleft()
+                    if i + PREFETCH_COUNT < len(dated_files):
+                        pending.append(reader.submit(dated_files[i + PREFETCH_COUNT].read_bytes))
+                    try:
+                        data = future.result()
+                    except OSError as e:
+                        click.echo(f"处理 {img} 时出错: {e}", err=True)
+                        continue
+                    if self.add_watermark(img, font_size, color, position, output_dir, date_text, data):
+                        success += 1
+        elif executor == 'thread':
+            # Pillow 在 JPEG 编解码时释放 GIL，线程池即可并行且无需 pickle
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                futures = [ex.submit(self.add_watermark, img, font_size, color, position, output_dir, date_text)
+                           for img, date_text in zip(dated_files, dates)]
+                for future in as_completed(futures):
+                    if future.result():
+                        success += 1
+        elif dated_files:
+            worker = functools.partial(_add_watermark_worker, self, font_size=font_size, color=color,
+                                       position=position, output_dir=output_dir)
+            # 每张图片的解码/合成/编码互不依赖，分发到多个进程并行处理；
+            # 按完成顺序收集结果，慢图片不会阻塞后续进度，chunksize 摊薄进程间通信开销
+            with multiprocessing.Pool(processes=workers) as pool:
+                for ok in pool.imap_unordered(worker, zip(dated_files, dates), chunksize=8):
+                    success += int(ok)
         click.echo(f"完成: 成功 {success}/{len(image_files)}")
 
     def process_single_file(self, file_path, font_size, color, position):
@@ -158,6 +289,12 @@ class PhotoWatermark:
         click.echo(f"处理单个文件: {file_path.name}")
         self.add_watermark(file_path, font_size, color, position, output_dir)
 
+
+def _add_watermark_worker(wm, task, font_size, color, position, output_dir):
+    """进程池任务入口（模块级函数，便于 pickle），task 为 (图片路径, 拍摄日期)"""
+    image_path, date_text = task
+    return wm.add_watermark(image_path, font_size, color, position, output_dir, date_text)
+
 @click.command()
 @click.argument('input_path', type=click.Path(exists=True, path_type=Path))
 @click.option('--font-size', '-s', default=36, show_default=True, help='字体大小')
@@ -170,17 +307,33 @@ class PhotoWatermark:
               ]),
               default='bottom-right', show_default=True,
               help='水印位置')
-def main(input_path: Path, font_size, color, position):
+@click.option('--workers', '-w', type=click.IntRange(min=1), default=None,
+              help='并行处理的工作数 (默认: CPU 核心数)')
+@click.option('--executor', type=click.Choice(['thread', 'process']),
+              default='process', show_default=True,
+              help='并行方式: 线程池或进程池')
+@click.option('--quality', '-q', type=click.IntRange(1, 100), default=90, show_default=True,
+              help='JPEG 输出质量')
+@click.option('--optimize/--no-optimize', default=False, show_default=True,
+              help='优化 JPEG 霍夫曼表 (文件略小，但编码更慢)')
+@click.option('--max-width', type=click.IntRange(min=1), default=None,
+              help='输出图片的最大宽度，超出时按比例缩小')
+def main(input_path: Path, font_size, color, position, workers, executor, quality, optimize, max_width):
     """输入路径可以是 单个图片文件 或 包含图片的目录。"""
+    # 颜色只解析一次，之后以 RGB 元组传给每张图片
+    try:
+        color_rgb = ImageColor.getrgb(color)
+    except ValueError:
+        raise click.BadParameter(f"无法识别的颜色: {color}", param_hint="'--color'")
     click.echo("=== Photo Watermark Tool ===")
     click.echo(f"输入路径: {input_path}")
     click.echo(f"字体: {font_size}px 颜色: {color} 位置: {position}")
     click.echo("--------------------------------")
-    wm = PhotoWatermark()
+    wm = PhotoWatermark(quality=quality, optimize=optimize, max_width=max_width)
     if input_path.is_file():
-        wm.process_single_file(input_path, font_size, color, position)
+        wm.process_single_file(input_path, font_size, color_rgb, position)
     else:
-        wm.process_directory(input_path, font_size, color, position)
+        wm.process_directory(input_path, font_size, color_rgb, position, workers, executor)
 
 if __name__ == '__main__':
     main()
@@ -5,15 +5,149 @@ Photo Watermark GUI Tool
 基于GUI的图片水印工具，支持拖拽导入、批量处理和缩略图预览
 """
 
+import io
 import os
 import json
+import functools
+import sqlite3
+import struct
+from stat import S_ISREG
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, colorchooser
-from PIL import Image, ImageTk, ImageDraw, ImageFont, ImageEnhance
-import piexif
+# ImageDraw/ImageFont/ImageColor 和 piexif 在首次使用时才导入，缩短启动时间
+from PIL import Image, ImageTk
 from pathlib import Path
 from datetime import datetime
 import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import multiprocessing
+
+
+# 像素数超过上限的图片在 Image.open 时即被拒绝，不会进入解码：Pillow 默认只对超过上限发出警告，
+# 超过两倍才抛出 DecompressionBombError，这里把警告也提升为异常（DecompressionBombWarning 是 Exception 的子类）
+Image.MAX_IMAGE_PIXELS = 200_000_000
+warnings.simplefilter('error', Image.DecompressionBombWarning)
+# 超过该大小的文件不加入列表，空文件也直接跳过
+MAX_FILE_BYTES = 200 * 1024 * 1024
+
+FONT_PATHS = (
+    "C:/Windows/Fonts/simhei.ttf",
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/arial.ttf",
+)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_font(font_path, font_size):
+    """加载字体并缓存，预览刷新和批量处理时同一字号只解析一次 TTF"""
+    from PIL import ImageFont
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, font_size)
+        except Exception:
+            pass
+    return ImageFont.load_default()
+
+
+def _format_exif_date(raw):
+    """把 EXIF 的 b'YYYY:MM:DD HH:MM:SS' 直接切片为 'YYYY-MM-DD'，格式不符返回 None
+
+    相机未设置时钟时写入的 '0000:00:00 00:00:00' 以及越界的月、日同样返回 None，由调用方改用下一个日期字段。
+    """
+    try:
+        if len(raw) >= 10 and raw[4:5] == b':' and raw[7:8] == b':':
+            date = raw[:10].replace(b':', b'-').decode('ascii')
+            if date[:4].isdigit() and date[5:7].isdigit() and date[8:10].isdigit():
+                if int(date[:4]) > 0 and 1 <= int(date[5:7]) <= 12 and 1 <= int(date[8:10]) <= 31:
+                    return date
+    except Exception:
+        pass
+    return None
+
+
+def _scan_exif_date(exif_bytes):
+    """直接遍历 TIFF 结构查找拍摄时间，找到即返回，不解析其余 IFD 和内嵌缩略图。
+
+    查找顺序与 piexif 版本一致：DateTimeOriginal、DateTimeDigitized，最后是 IFD0 的 DateTime。
+    结构异常时抛出异常，由调用方回退到 piexif。
+    """
+    data = exif_bytes[6:] if exif_bytes[:6] == b'Exif\x00\x00' else exif_bytes
+    if data[:2] == b'II':
+        endian = '<'
+    elif data[:2] == b'MM':
+        endian = '>'
+    else:
+        raise ValueError("无效的TIFF头")
+    unpack = struct.unpack_from
+
+    def read_ifd(offset, wanted):
+        # 每个条目 12 字节：tag(2) type(2) count(4) value/offset(4)
+        found = {}
+        count = unpack(endian + 'H', data, offset)[0]
+        for i in range(count):
+            tag, _, num, value = unpack(endian + 'HHII', data, offset + 2 + i * 12)
+            if tag in wanted:
+                found[tag] = (num, value)
+        return found
+
+    def read_ascii(entry):
+        num, value = entry
+        if num <= 4:
+            return None
+        return _format_exif_date(data[value:value + min(num, 20)])
+
+    ifd0 = read_ifd(unpack(endian + 'I', data, 4)[0], (0x8769, 0x0132))
+    if 0x8769 in ifd0:
+        exif_ifd = read_ifd(ifd0[0x8769][1], (0x9003, 0x9004))
+        for tag in (0x9003, 0x9004):
+            if tag in exif_ifd:
+                date = read_ascii(exif_ifd[tag])
+                if date:
+                    return date
+    if 0x0132 in ifd0:
+        return read_ascii(ifd0[0x0132])
+    return None
+
+
+def _set_if_changed(var, value):
+    """值未变化时不写入 Tk 变量；拖动滑块时大部分移动不改变取整后的值，可省去多余的 trace 回调和标签重绘"""
+    if var.get() != value:
+        var.set(value)
+
+
+def _output_exif(exif_bytes, size):
+    """整理写入输出文件的EXIF，返回可直接传给 save(exif=...) 的字节串；无法解析时返回 b''
+
+    像素未按 Orientation 旋转，方向重置为 1，水印位置与看到的画面一致；
+    去掉未加水印的内嵌缩略图，像素尺寸改为输出尺寸。
+    """
+    if not exif_bytes:
+        return b''
+    try:
+        import piexif
+        exif_data = piexif.load(exif_bytes)
+        exif_data["0th"][piexif.ImageIFD.Orientation] = 1
+        for tag, value in ((piexif.ImageIFD.ImageWidth, size[0]), (piexif.ImageIFD.ImageLength, size[1])):
+            if tag in exif_data["0th"]:
+                exif_data["0th"][tag] = value
+        exif_data["Exif"][piexif.ExifIFD.PixelXDimension] = size[0]
+        exif_data["Exif"][piexif.ExifIFD.PixelYDimension] = size[1]
+        exif_data["1st"] = {}
+        exif_data["thumbnail"] = None
+        return piexif.dump(exif_data)
+    except Exception as e:
+        print(f"无法写入EXIF信息: {e}")
+        return b''
+
+
+def _write_json_atomic(path, data):
+    """先写临时文件再 os.replace，避免写入中断留下半个 JSON"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
 
 
 class ImageItem:
@@ -24,54 +158,450 @@ class ImageItem:
         self.thumbnail = None
         self.exif_date = None
         self.processed = False
-        self._load_thumbnail()
-        self._extract_exif_date()
+        self.original_size = None  # 原图尺寸，读取文件头时顺便记录
+        self._pil_thumbnail = None
 
-    def _load_thumbnail(self):
-        """加载缩略图"""
+    def load(self):
+        """只打开一次文件，同时读取EXIF并生成缩略图；不涉及Tk，可在工作线程中调用"""
+        exif_bytes = b''
         try:
             with Image.open(self.file_path) as img:
-                img.thumbnail((100, 100), Image.Resampling.LANCZOS)
-                self.thumbnail = ImageTk.PhotoImage(img)
+                # EXIF 位于文件头中，解码像素前即可取出
+                exif_bytes = img.info.get('exif', b'')
+                self.original_size = img.size
+                # JPEG 在解码时直接按 1/2~1/8 缩小，其他格式 draft 不起作用
+                img.draft('RGB', (200, 200))
+                # 大幅缩小时 BILINEAR 已足够清晰，源图接近缩略图尺寸时才用 LANCZOS
+                resample = Image.Resampling.BILINEAR if max(img.size) > 400 else Image.Resampling.LANCZOS
+                img.thumbnail((100, 100), resample)
+                self._pil_thumbnail = img.copy()
         except Exception as e:
             print(f"无法加载缩略图: {e}")
-            self.thumbnail = None
-
-    def _extract_exif_date(self):
-        """提取EXIF拍摄时间"""
+            self._pil_thumbnail = None
+
+        if exif_bytes:
+            self._parse_exif_date(exif_bytes)
+
+    def load_cached(self, png_bytes, exif_date):
+        """从缩略图缓存恢复，跳过原图解码"""
+        with Image.open(io.BytesIO(png_bytes)) as img:
+            img.load()
+            self._pil_thumbnail = img.copy()
+        self.exif_date = exif_date
+
+    def thumbnail_png(self):
+        """将缩略图编码为 PNG，用于写入缓存；失败时返回 None"""
+        if self._pil_thumbnail is None:
+            return None
         try:
-            with Image.open(self.file_path) as image:
-                exif_bytes = image.info.get('exif', b'')
-                if not exif_bytes:
-                    return
+            buf = io.BytesIO()
+            self._pil_thumbnail.save(buf, 'PNG')
+            return buf.getvalue()
+        except Exception:
+            return None
 
-                exif_data = piexif.load(exif_bytes)
-                date_fields = [
-                    piexif.ExifIFD.DateTimeOriginal,
-                    piexif.ExifIFD.DateTimeDigitized,
-                ]
+    @property
+    def thumbnail_size(self):
+        """缩略图尺寸，无缩略图时为 None"""
+        return self._pil_thumbnail.size if self._pil_thumbnail is not None else None
 
-                for field in date_fields:
-                    if field in exif_data.get('Exif', {}):
-                        try:
-                            date_str = exif_data['Exif'][field].decode('utf-8')
-                            date_obj = datetime.strptime(date_str, '%Y:%m:%d %H:%M:%S')
-                            self.exif_date = date_obj.strftime('%Y-%m-%d')
-                            return
-                        except Exception:
-                            continue
+    def create_photo(self):
+        """按需把缩略图转换为 PhotoImage 并返回，必须在Tk主线程中调用"""
+        if self.thumbnail is None and self._pil_thumbnail is not None:
+            self.thumbnail = ImageTk.PhotoImage(self._pil_thumbnail)
+        return self.thumbnail
 
-                if piexif.ImageIFD.DateTime in exif_data.get('0th', {}):
-                    try:
-                        date_str = exif_data['0th'][piexif.ImageIFD.DateTime].decode('utf-8')
-                        date_obj = datetime.strptime(date_str, '%Y:%m:%d %H:%M:%S')
-                        self.exif_date = date_obj.strftime('%Y-%m-%d')
-                    except Exception:
-                        pass
+    def release_photo(self):
+        """行滚出可见区域后释放 PhotoImage，保留 PIL 缩略图以便再次显示"""
+        self.thumbnail = None
+
+    def _parse_exif_date(self, exif_bytes):
+        """从EXIF数据中提取拍摄时间；优先走只查日期标签的快速路径"""
+        try:
+            self.exif_date = _scan_exif_date(exif_bytes)
+            return
+        except Exception:
+            pass
+        try:
+            import piexif
+            exif_data = piexif.load(exif_bytes)
+            date_fields = [
+                piexif.ExifIFD.DateTimeOriginal,
+                piexif.ExifIFD.DateTimeDigitized,
+            ]
+
+            for field in date_fields:
+                if field in exif_data.get('Exif', {}):
+                    date = _format_exif_date(exif_data['Exif'][field])
+                    if date:
+                        self.exif_date = date
+                        return
+
+            if piexif.ImageIFD.DateTime in exif_data.get('0th', {}):
+                self.exif_date = _format_exif_date(exif_data['0th'][piexif.ImageIFD.DateTime])
         except Exception as e:
             print(f"无法提取EXIF信息: {e}")
 
 
+def _load_image_item(image_item):
+    """后台任务：加载图片信息，返回用于写入缓存的缩略图 PNG"""
+    image_item.load()
+    return image_item.thumbnail_png()
+
+
+class ThumbnailCache:
+    """缩略图与EXIF日期的磁盘缓存，按 (路径, 修改时间, 文件大小) 判断是否有效"""
+
+    def __init__(self, db_path):
+        try:
+            self.conn = sqlite3.connect(str(db_path))
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS thumbs ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, png BLOB, exif TEXT)"
+            )
+        except sqlite3.Error as e:
+            print(f"无法打开缩略图缓存: {e}")
+            self.conn = None
+
+    def get(self, path, stat):
+        """返回 (png, exif_date)，未命中或已失效时返回 None"""
+        if self.conn is None:
+            return None
+        try:
+            return self.conn.execute(
+                "SELECT png, exif FROM thumbs WHERE path = ? AND mtime_ns = ? AND size = ?",
+                (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"读取缩略图缓存时出错: {e}")
+            return None
+
+    def put(self, path, stat, png, exif_date):
+        """写入缓存，同一路径只保留最新的一条"""
+        if self.conn is None:
+            return
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO thumbs VALUES (?, ?, ?, ?, ?)",
+                (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, png, exif_date)
+            )
+        except sqlite3.Error as e:
+            print(f"写入缩略图缓存时出错: {e}")
+
+    def commit(self):
+        if self.conn is not None:
+            try:
+                self.conn.commit()
+            except sqlite3.Error as e:
+                print(f"写入缩略图缓存时出错: {e}")
+
+    def close(self):
+        if self.conn is not None:
+            self.commit()
+            self.conn.close()
+            self.conn = None
+
+
+# 位置名 -> (图片宽, 图片高, 水印宽, 水印高) 到坐标的映射，边距 10 像素
+_POSITION_FUNCS = {
+    'top-left': lambda iw, ih, ww, wh: (10, 10),
+    'top-center': lambda iw, ih, ww, wh: ((iw - ww) // 2, 10),
+    'top-right': lambda iw, ih, ww, wh: (iw - ww - 10, 10),
+    'center-left': lambda iw, ih, ww, wh: (10, (ih - wh) // 2),
+    'center': lambda iw, ih, ww, wh: ((iw - ww) // 2, (ih - wh) // 2),
+    'center-right': lambda iw, ih, ww, wh: (iw - ww - 10, (ih - wh) // 2),
+    'bottom-left': lambda iw, ih, ww, wh: (10, ih - wh - 10),
+    'bottom-center': lambda iw, ih, ww, wh: ((iw - ww) // 2, ih - wh - 10),
+    'bottom-right': lambda iw, ih, ww, wh: (iw - ww - 10, ih - wh - 10),
+}
+
+
+def _get_position_coordinates(image_size, watermark_size, position, manual_x=0, manual_y=0):
+    """根据位置参数计算水印坐标，支持手动位置"""
+    if position == "manual":
+        return (int(manual_x), int(manual_y))
+    # 未知位置按右下角处理
+    func = _POSITION_FUNCS.get(position, _POSITION_FUNCS['bottom-right'])
+    return func(*image_size, *watermark_size)
+
+
+def _working_mode(image):
+    """处理时使用的图像模式：源图有透明通道时用 RGBA，否则保持 RGB（少一个通道，保存 JPEG 时也无需铺白底）"""
+    return 'RGBA' if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info else 'RGB'
+
+
+def _composite_at(image, tile, x, y):
+    """把 RGBA 小图层原地合成到 image 的 (x, y) 处，只处理重叠区域"""
+    if image.mode != 'RGBA':
+        # 不透明底图上按图层 alpha 混合即可，paste 会自动裁剪越界部分
+        image.paste(tile, (x, y), tile)
+        return
+    # alpha_composite 要求目标坐标非负，超出左上边界的部分从图层中裁掉
+    source = (max(0, -x), max(0, -y))
+    if source[0] < tile.size[0] and source[1] < tile.size[1]:
+        image.alpha_composite(tile, (max(0, x), max(0, y)), source)
+
+
+@functools.lru_cache(maxsize=16)
+def _get_text_color(color, opacity):
+    """解析颜色并合并透明度，颜色和透明度不变时直接复用上次结果"""
+    from PIL import ImageColor
+    try:
+        rgb_color = ImageColor.getrgb(color)[:3]
+    except ValueError:
+        rgb_color = (255, 255, 255)
+    alpha = int(255 * (opacity / 100))
+    return rgb_color + (alpha,)
+
+
+@functools.lru_cache(maxsize=32)
+def _text_tile(text, font_path, font_size, color, opacity, rotation_angle):
+    """绘制文本水印图层，返回 (图层, 粘贴偏移, 文字尺寸)。
+    批量处理中相同文本（自定义文本或同一天的EXIF日期）只测量和绘制一次；返回的图层只读，调用方不得修改"""
+    font = _load_font(font_path, font_size)
+
+    bbox = font.getbbox(text)
+    text_width, text_height = bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+    final_color = _get_text_color(color, opacity)
+
+    # 只在文本大小的小图层上绘制背景和文字，再合成到原图，避免生成整幅覆盖层
+    padding = 5
+    sprite_width = max(text_width + 2 * padding + 1, padding + bbox[2] + 1)
+    sprite_height = max(text_height + 2 * padding + 1, padding + bbox[3] + 1)
+    sprite = Image.new('RGBA', (sprite_width, sprite_height), (0, 0, 0, 0))
+    from PIL import ImageDraw
+    sprite_draw = ImageDraw.Draw(sprite)
+    sprite_draw.rectangle(
+        [0, 0, text_width + 2 * padding, text_height + 2 * padding],
+        fill=(0, 0, 0, int(128 * (opacity / 100)))
+    )
+    sprite_draw.text((padding, padding), text, fill=final_color, font=font)
+
+    if rotation_angle != 0:
+        # 旋转文本图层，保持文本中心位置不变
+        sprite = sprite.rotate(rotation_angle, resample=Image.Resampling.BILINEAR, expand=True)
+        offset = (text_width // 2 - sprite.size[0] // 2, text_height // 2 - sprite.size[1] // 2)
+    else:
+        offset = (-padding, -padding)
+
+    return sprite, offset, (text_width, text_height)
+
+
+def _render_text_tile(params, font_path=None):
+    """把文本水印（背景框+文字，含旋转）绘制为小图层
+    返回 (图层, 粘贴偏移, 文字尺寸, 消息)，粘贴位置 = 文字位置 + 偏移；失败时图层为 None"""
+    watermark_text = ""
+    if params["watermark_text_source"] == "EXIF Date":
+        if not params["exif_date"]:
+            return None, None, None, "无EXIF拍摄时间"
+        watermark_text = params["exif_date"]
+    else:  # Custom Text
+        if not params["custom_watermark_text"]:
+            return None, None, None, "自定义文本为空"
+        watermark_text = params["custom_watermark_text"]
+
+    tile, offset, size = _text_tile(watermark_text, font_path, params["font_size"], params["color"],
+                                    params["text_opacity"], params.get("rotation_angle", 0))
+    return tile, offset, size, "成功"
+
+
+@functools.lru_cache(maxsize=4)
+def _decode_watermark(watermark_path, mtime_ns, opacity):
+    """解码水印图片并调整透明度；原图宽度不同只影响缩放，解码和透明度处理每批只做一次"""
+    with Image.open(watermark_path) as src:
+        watermark = src.convert("RGBA")
+
+    # 调整水印透明度
+    if opacity < 100:
+        # 用查找表一次缩放 alpha 通道
+        alpha = watermark.getchannel('A').point([v * opacity // 100 for v in range(256)])
+        watermark.putalpha(alpha)
+    return watermark
+
+
+@functools.lru_cache(maxsize=32)
+def _load_watermark(watermark_path, mtime_ns, opacity, target_width, rotation_angle):
+    """加载并预处理水印图片（透明度、缩放、旋转），相同参数只处理一次；mtime_ns 用于文件变化后失效"""
+    watermark = _decode_watermark(watermark_path, mtime_ns, opacity)
+
+    # 调整水印大小
+    w_width, w_height = watermark.size
+    w_ratio = w_height / w_width
+    target_height = int(target_width * w_ratio)
+    watermark = watermark.resize((target_width, target_height), Image.Resampling.LANCZOS)
+
+    # 应用旋转
+    if rotation_angle != 0:
+        watermark = watermark.rotate(rotation_angle, expand=True)
+    return watermark
+
+
+def _render_image_tile(image_width, params):
+    """生成图片水印图层，返回值与 _render_text_tile 相同"""
+    watermark_path = params["image_watermark_path"]
+    try:
+        mtime_ns = os.stat(watermark_path).st_mtime_ns if watermark_path else None
+    except OSError:
+        mtime_ns = None
+    if mtime_ns is None:
+        return None, None, None, "水印图片路径无效"
+
+    # 水印宽度按原图宽度的百分比计算
+    target_width = int(image_width * (params["image_scale"] / 100))
+    watermark = _load_watermark(watermark_path, mtime_ns, params["image_opacity"],
+                                target_width, params.get("rotation_angle", 0))
+    return watermark, (0, 0), watermark.size, "成功"
+
+
+def _render_watermark_tile(image_width, params, font_path=None):
+    """按水印类型生成水印图层"""
+    if params["watermark_type"] == "Text":
+        return _render_text_tile(params, font_path)
+    return _render_image_tile(image_width, params)
+
+
+def _apply_watermark(image, params, font_path=None):
+    """生成水印图层并合成到 image（原地修改），返回 (image, 消息)，失败时 image 为 None"""
+    tile, offset, size, message = _render_watermark_tile(image.size[0], params, font_path)
+    if tile is None:
+        return None, message
+
+    # 计算位置（支持手动位置），只在水印所在区域合成
+    manual_x = params.get("manual_x", 0)
+    manual_y = params.get("manual_y", 0)
+    x, y = _get_position_coordinates(image.size, size, params["position"], manual_x, manual_y)
+    _composite_at(image, tile, x + offset[0], y + offset[1])
+    return image, "成功"
+
+
+def _preview_display_size(original_size, canvas_width, canvas_height, zoom):
+    """计算预览图在画布上的显示尺寸：适应画布（不放大），再乘以用户缩放"""
+    if canvas_width <= 1 or canvas_height <= 1:
+        return original_size
+    auto_scale = min(canvas_width / original_size[0], canvas_height / original_size[1], 1.0)
+    final_scale = auto_scale * zoom
+    return (int(original_size[0] * final_scale), int(original_size[1] * final_scale))
+
+
+def _render_preview(file_path, params, font_path, canvas_width, canvas_height, zoom):
+    """在原图上渲染完整预览并缩放到显示尺寸；不涉及Tk，可在工作线程中调用
+    返回 (图像, 消息, 原图尺寸)，失败时图像为 None"""
+    with Image.open(file_path) as src:
+        img = src.convert(_working_mode(src))
+    original_size = img.size
+
+    # 应用水印（不对整个图像进行旋转，旋转只应用于水印）
+    img, message = _apply_watermark(img, params, font_path)
+
+    if img is not None:
+        # 预览只需适应画布，双线性足够；LANCZOS 仅用于批量输出
+        new_size = _preview_display_size(original_size, canvas_width, canvas_height, zoom)
+        if new_size != img.size:
+            img = img.resize(new_size, Image.Resampling.BILINEAR)
+    return img, message, original_size
+
+
+def _save_image(image, output_path, image_format, **options):
+    """先编码到内存再一次性写盘：写入调用少，编码失败时也不会留下不完整的输出文件"""
+    buf = io.BytesIO()
+    image.save(buf, image_format, **options)
+    with open(output_path, 'wb') as f:
+        f.write(buf.getbuffer())
+
+
+def _process_single_image(file_path, exif_date, output_dir, font_path, params):
+    """处理单张图片；只接收可序列化的参数，可在子进程中运行"""
+    try:
+        with Image.open(file_path) as image:
+            working_mode = _working_mode(image)
+            # 原图的 EXIF（拍摄时间、相机信息等）整理后写入输出文件
+            exif_bytes = image.info.get('exif', b'')
+
+            # 调整尺寸
+            if params["resize_option"] != '不缩放':
+                w, h = image.size
+                if params["resize_option"] == '按宽度':
+                    new_w = params["resize_value"]
+                    new_h = int(h * (new_w / w))
+                elif params["resize_option"] == '按高度':
+                    new_h = params["resize_value"]
+                    new_w = int(w * (new_h / h))
+                elif params["resize_option"] == '按百分比':
+                    new_w = int(w * params["resize_value"] / 100)
+                    new_h = int(h * params["resize_value"] / 100)
+                else:
+                    new_w, new_h = w, h
+                if new_w * 2 <= w and new_h * 2 <= h:
+                    # 缩小到一半以下时，JPEG 在解码阶段直接按 1/2~1/8 缩小，其他格式 draft 不起作用
+                    image.draft(image.mode, (new_w, new_h))
+                # reducing_gap: 先按整数倍 reduce() 再做 LANCZOS，大幅缩小时卷积的像素少得多，画质差异可忽略
+                image = image.resize((new_w, new_h), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+            # 有透明通道时在 RGBA 上处理，否则保持 RGB
+            if image.mode != working_mode:
+                image = image.convert(working_mode)
+            if working_mode == 'RGBA' and params["output_format"] == 'JPEG':
+                # JPEG 不保存透明度：先铺到白底再加水印，与加水印后再铺白底结果相同，
+                # 之后的合成和保存都在 RGB 上进行；直接以图像自身作为蒙版，无需 split()
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image)
+                image = background
+
+            # 应用水印
+            params = dict(params, exif_date=exif_date)
+            image, message = _apply_watermark(image, params, font_path)
+
+            if image is None:
+                return False, message
+
+            # 根据输出格式进行转换和保存
+            output_ext = {'JPEG': '.jpg', 'WebP': '.webp'}.get(params["output_format"], '.png')
+            new_filename = f"{params['prefix']}{file_path.stem}{params['suffix']}{output_ext}"
+            output_path = output_dir / new_filename
+            exif_bytes = _output_exif(exif_bytes, image.size)
+
+            if params["output_format"] == 'JPEG':
+                # 与命令行版本一致：单遍基线编码、4:2:0 色度抽样
+                _save_image(image, output_path, 'JPEG', quality=params["quality"],
+                            optimize=params.get("jpeg_optimize", False), progressive=False, subsampling=2,
+                            exif=exif_bytes)
+            elif params["output_format"] == 'WebP':
+                # method=0 编码最快，保留透明通道
+                _save_image(image, output_path, 'WEBP', quality=params["quality"],
+                            method=0 if params.get("fast_save") else 4, exif=exif_bytes)
+            else: # PNG
+                if params.get("fast_save"):
+                    # 最低压缩级别，文件稍大但保存快很多
+                    _save_image(image, output_path, 'PNG', compress_level=1, exif=exif_bytes)
+                else:
+                    _save_image(image, output_path, 'PNG', optimize=True, exif=exif_bytes)
+
+            return True, "成功"
+
+    except Exception as e:
+        return False, str(e)
+
+
+# 图片数少于该值时用线程池处理：Pillow 编解码时释放 GIL，且省去启动子进程（Windows 上需重新导入本模块）的开销
+PROCESS_POOL_MIN_TASKS = 8
+
+# 批处理时每个工作进程共用的 (输出目录, 字体路径, 参数)，由进程池初始化函数设置
+_batch_context = None
+
+
+def _init_batch_worker(output_dir, font_path, params):
+    """进程池初始化：整批共用的参数每个工作进程只传递一次"""
+    global _batch_context
+    _batch_context = (output_dir, font_path, params)
+
+
+def _process_batch_item(file_path, exif_date):
+    """在工作进程中处理一张图片，只需传递随图片变化的参数"""
+    output_dir, font_path, params = _batch_context
+    return _process_single_image(file_path, exif_date, output_dir, font_path, params)
+
+
 class WatermarkGUI:
     """图片水印GUI应用程序"""
 
@@ -81,8 +611,19 @@ class WatermarkGUI:
         self.root.geometry("1200x800")  # 增大窗口以容纳预览区域
 
         # 支持的图片格式
-        self.supported_formats = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
+        self.supported_formats = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'})
+        self._font_path = next((fp for fp in FONT_PATHS if os.path.exists(fp)), None)
         self.image_items = []
+        self._paths_seen = set()  # 与 image_items 同步，用于 O(1) 去重
+        self._row_widgets = []  # 图片列表的行控件池，按行复用
+        self._thumb_placeholders = {}  # 尺寸 -> 空白 PhotoImage，占位以保持行高不变
+        self._thumb_sync_id = None
+        self._list_updating = False  # 批量更新行期间不重复计算滚动区域
+
+        # 后台加载缩略图的线程池（Pillow 解码时释放 GIL）
+        self._loader = ThreadPoolExecutor(max_workers=os.cpu_count())
+        self._pending_paths = set()
+        self._load_generation = 0  # 清空列表时递增，之前提交的加载结果随之作废
 
         # --- 设置变量 ---
         # 水印类型
@@ -107,6 +648,8 @@ class WatermarkGUI:
         # 输出变量
         self.output_format = tk.StringVar(value="JPEG")
         self.output_quality = tk.IntVar(value=95)
+        self.fast_save = tk.BooleanVar(value=False)  # PNG 低压缩 / WebP 最快编码
+        self.jpeg_optimize = tk.BooleanVar(value=False)  # 优化霍夫曼表：文件略小，编码约慢一倍
         self.output_dir = tk.StringVar()
         self.filename_prefix = tk.StringVar()
         self.filename_suffix = tk.StringVar(value="_watermarked")
@@ -118,6 +661,19 @@ class WatermarkGUI:
         self.preview_image = None
         self.preview_photo = None
         self.preview_scale = 1.0
+        self._preview_after_id = None  # 待执行的合并预览刷新
+        self._dirty = False  # 预览是否需要刷新
+        # 拖拽时使用的低分辨率代理图（适应 800x800），按预览图片缓存
+        self._preview_proxy = None
+        self._preview_proxy_item = None
+        self._drag_cache_key = None  # 拖拽预览缓存：(底图, 水印图层)
+        self._drag_cache = None
+        # 后台预览渲染：只保留最新请求，序号用于丢弃过期结果
+        self._render_cond = threading.Condition()
+        self._render_request = None
+        self._render_seq = 0
+        threading.Thread(target=self._preview_worker, daemon=True).start()
+        self._proxy_shown = False  # 画布上当前是否为代理图渲染结果
 
         # 拖拽相关变量
         self.drag_start_x = 0
@@ -131,7 +687,14 @@ class WatermarkGUI:
         self.templates_dir = Path("templates")
         self.templates_dir.mkdir(exist_ok=True)
         self.settings_file = self.templates_dir / "last_settings.json"
+        self._saved_settings = None  # 与 settings_file 内容一致的设置，未变化时关闭窗口不再写盘
+        # 缩略图缓存放在单独的子目录：数据库及其日志文件的写入不改变模板目录的 mtime，模板列表缓存不会因此失效
+        cache_dir = self.templates_dir / "cache"
+        cache_dir.mkdir(exist_ok=True)
+        self.thumb_cache = ThumbnailCache(cache_dir / "thumb_cache.sqlite")
         self.current_template_name = tk.StringVar()
+        self._template_cache = {}  # 模板路径 -> (mtime_ns, 设置字典)
+        self._templates_index = (None, [])  # (模板目录 mtime_ns, 按修改时间排序的模板文件)
 
         self.create_widgets()
         self.setup_drag_drop()
@@ -218,8 +781,8 @@ class WatermarkGUI:
         font_size_display = tk.StringVar(value=str(self.font_size.get()))
         def update_font_size_display(value):
             int_value = int(float(value))
-            self.font_size.set(int_value)
-            font_size_display.set(str(int_value))
+            _set_if_changed(self.font_size, int_value)
+            _set_if_changed(font_size_display, str(int_value))
         font_scale = ttk.Scale(text_watermark_frame, from_=12, to=100, variable=self.font_size, orient=tk.HORIZONTAL, command=update_font_size_display)
         font_scale.grid(row=0, column=1, sticky="ew", pady=2, padx=(5, 0))
         ttk.Label(text_watermark_frame, textvariable=font_size_display).grid(row=0, column=2, pady=2, padx=(5, 0))
@@ -236,8 +799,8 @@ class WatermarkGUI:
         opacity_display = tk.StringVar(value=f"{self.text_opacity.get()}%")
         def update_opacity_display(value):
             int_value = int(float(value))
-            self.text_opacity.set(int_value)
-            opacity_display.set(f"{int_value}%")
+            _set_if_changed(self.text_opacity, int_value)
+            _set_if_changed(opacity_display, f"{int_value}%")
         opacity_scale = ttk.Scale(text_watermark_frame, from_=0, to=100, variable=self.text_opacity, orient=tk.HORIZONTAL, command=update_opacity_display)
         opacity_scale.grid(row=2, column=1, sticky="ew", pady=2, padx=(5, 0))
         ttk.Label(text_watermark_frame, textvariable=opacity_display).grid(row=2, column=2, pady=2, padx=(5, 0))
@@ -274,8 +837,8 @@ class WatermarkGUI:
         image_scale_display = tk.StringVar(value=f"{self.image_scale.get()}%")
         def update_image_scale_display(value):
             int_value = int(float(value))
-            self.image_scale.set(int_value)
-            image_scale_display.set(f"{int_value}%")
+            _set_if_changed(self.image_scale, int_value)
+            _set_if_changed(image_scale_display, f"{int_value}%")
         image_scale_slider = ttk.Scale(image_watermark_frame, from_=1, to=100, variable=self.image_scale, orient=tk.HORIZONTAL, command=update_image_scale_display)
         image_scale_slider.grid(row=1, column=1, sticky="ew", pady=2, padx=(5, 0))
         ttk.Label(image_watermark_frame, textvariable=image_scale_display).grid(row=1, column=2, pady=2, padx=(5, 0))
@@ -285,8 +848,8 @@ class WatermarkGUI:
         image_opacity_display = tk.StringVar(value=f"{self.image_opacity.get()}%")
         def update_image_opacity_display(value):
             int_value = int(float(value))
-            self.image_opacity.set(int_value)
-            image_opacity_display.set(f"{int_value}%")
+            _set_if_changed(self.image_opacity, int_value)
+            _set_if_changed(image_opacity_display, f"{int_value}%")
         image_opacity_slider = ttk.Scale(image_watermark_frame, from_=0, to=100, variable=self.image_opacity, orient=tk.HORIZONTAL, command=update_image_opacity_display)
         image_opacity_slider.grid(row=2, column=1, sticky="ew", pady=2, padx=(5, 0))
         ttk.Label(image_watermark_frame, textvariable=image_opacity_display).grid(row=2, column=2, pady=2, padx=(5, 0))
@@ -313,8 +876,8 @@ class WatermarkGUI:
         self.rotation_display = tk.StringVar(value=f"{self.rotation_angle.get()}°")
         def update_rotation_display(value):
             int_value = int(float(value))
-            self.rotation_angle.set(int_value)
-            self.rotation_display.set(f"{int_value}°")
+            _set_if_changed(self.rotation_angle, int_value)
+            _set_if_changed(self.rotation_display, f"{int_value}°")
 
         def reset_rotation():
             self.rotation_angle.set(0)
@@ -332,16 +895,20 @@ class WatermarkGUI:
         # 输出格式
         ttk.Label(common_settings_frame, text="输出格式:").grid(row=2, column=0, sticky="w", pady=2)
         format_combo = ttk.Combobox(common_settings_frame, textvariable=self.output_format, state="readonly")
-        format_combo['values'] = ('JPEG', 'PNG')
-        format_combo.grid(row=2, column=1, columnspan=2, sticky="ew", pady=2, padx=(5, 0))
-
-        # 输出质量（仅JPEG）
-        ttk.Label(common_settings_frame, text="JPEG质量:").grid(row=3, column=0, sticky="w", pady=2)
+        format_combo['values'] = ('JPEG', 'PNG', 'WebP')
+        format_combo.grid(row=2, column=1, sticky="ew", pady=2, padx=(5, 0))
+        save_options_frame = ttk.Frame(common_settings_frame)
+        save_options_frame.grid(row=2, column=2, sticky="w", pady=2, padx=(5, 0))
+        ttk.Checkbutton(save_options_frame, text="快速保存", variable=self.fast_save).pack(side=tk.LEFT)
+        ttk.Checkbutton(save_options_frame, text="优化JPEG", variable=self.jpeg_optimize).pack(side=tk.LEFT, padx=(5, 0))
+
+        # 输出质量（JPEG/WebP）
+        ttk.Label(common_settings_frame, text="输出质量:").grid(row=3, column=0, sticky="w", pady=2)
         quality_display = tk.StringVar(value=str(self.output_quality.get()))
         def update_quality_display(value):
             int_value = int(float(value))
-            self.output_quality.set(int_value)
-            quality_display.set(str(int_value))
+            _set_if_changed(self.output_quality, int_value)
+            _set_if_changed(quality_display, str(int_value))
         quality_scale = ttk.Scale(common_settings_frame, from_=1, to=100, variable=self.output_quality, orient=tk.HORIZONTAL, command=update_quality_display)
         quality_scale.grid(row=3, column=1, sticky="ew", pady=2, padx=(5, 0))
         ttk.Label(common_settings_frame, textvariable=quality_display).grid(row=3, column=2, pady=2, padx=(5, 0))
@@ -386,19 +953,19 @@ class WatermarkGUI:
         scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.canvas.yview)
         self.scrollable_frame = ttk.Frame(self.canvas)
 
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(
-                scrollregion=self.canvas.bbox("all")
-            )
-        )
+        self.scrollable_frame.bind("<Configure>", self._on_list_configure)
 
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self._list_window_id = self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
+        self._list_scrollbar = scrollbar
+        self.canvas.configure(yscrollcommand=self._on_list_yview)
 
         self.canvas.grid(row=0, column=0, sticky="nsew")
         scrollbar.grid(row=0, column=1, sticky="ns")
 
+        # 指针位于列表上时滚轮用于滚动列表
+        self.canvas.bind("<Enter>", lambda e: self.canvas.bind_all("<MouseWheel>", self.on_list_mouse_wheel))
+        self.canvas.bind("<Leave>", self._on_list_leave)
+
         # 进度条
         self.progress = ttk.Progressbar(main_frame, mode='determinate')
         self.progress.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(10, 0))
@@ -421,7 +988,9 @@ class WatermarkGUI:
         self.preview_canvas.configure(yscrollcommand=preview_scrollbar.set)
 
         # 绑定画布滚动事件
-        self.preview_canvas.bind_all("<MouseWheel>", self.on_mouse_wheel)
+        # 滚轮事件只在指针位于预览区域时绑定，避免滚动列表时触发预览缩放
+        self.preview_canvas.bind("<Enter>", lambda e: self.preview_canvas.bind_all("<MouseWheel>", self.on_mouse_wheel))
+        self.preview_canvas.bind("<Leave>", lambda e: self.preview_canvas.unbind_all("<MouseWheel>"))
 
         # 预览状态标签
         self.preview_status_label = ttk.Label(preview_frame, text="请添加图片以查看预览", foreground="gray")
@@ -479,82 +1048,219 @@ class WatermarkGUI:
         """选择文件夹"""
         folder = filedialog.askdirectory(title="选择包含图片的文件夹")
         if folder:
-            folder_path = Path(folder)
-            image_files = []
-            for ext in self.supported_formats:
-                image_files.extend(folder_path.glob(f"*{ext}"))
-                image_files.extend(folder_path.glob(f"*{ext.upper()}"))
+            # 单次遍历并按小写后缀过滤；大小写不敏感的文件系统上分别 glob 大小写后缀会重复匹配同一文件
+            with os.scandir(folder) as it:
+                image_files = [e.path for e in it
+                               if e.is_file() and '.' + e.name.rpartition('.')[2].lower() in self.supported_formats]
 
             if image_files:
-                self.add_files([str(f) for f in image_files])
+                self.add_files(image_files)
             else:
                 messagebox.showinfo("提示", "所选文件夹中没有找到支持的图片文件")
 
     def add_files(self, file_paths):
-        """添加文件到列表"""
-        added_count = 0
+        """添加文件到列表，缩略图和EXIF在后台线程中并行加载"""
+        pending = []
         for file_path in file_paths:
             path = Path(file_path)
 
-            # 检查文件是否存在且为支持的格式
-            if path.exists() and path.suffix.lower() in self.supported_formats:
-                # 检查是否已经添加
-                if not any(item.file_path == path for item in self.image_items):
+            # 检查文件格式以及是否已经添加或正在加载（先做集合查找，再访问磁盘）
+            if path.suffix.lower() in self.supported_formats:
+                if path not in self._pending_paths and path not in self._paths_seen:
+                    # 一次 stat 同时判断文件是否存在并取得缓存校验信息
                     try:
-                        image_item = ImageItem(path)
-                        self.image_items.append(image_item)
-                        added_count += 1
-                    except Exception as e:
-                        print(f"无法添加文件 {path}: {e}")
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    if not S_ISREG(stat.st_mode):
+                        continue
+                    if not 0 < stat.st_size <= MAX_FILE_BYTES:
+                        print(f"跳过文件（大小异常）: {path}")
+                        continue
+                    image_item = ImageItem(path)
+                    self._pending_paths.add(path)
+                    cached = self.thumb_cache.get(path, stat)
+                    if cached:
+                        try:
+                            # 缓存命中，无需解码原图
+                            image_item.load_cached(*cached)
+                            pending.append((image_item, None, stat))
+                            continue
+                        except Exception as e:
+                            print(f"缩略图缓存无效 {path}: {e}")
+                    pending.append((image_item, self._loader.submit(_load_image_item, image_item), stat))
 
-        if added_count > 0:
-            self.update_image_list()
-            self.status_label.config(text=f"已添加 {added_count} 个文件，总计 {len(self.image_items)} 个")
+        if pending:
+            self.status_label.config(text=f"正在加载 {len(pending)} 个文件...")
+            self.root.after(50, self._finish_loading, pending, self._load_generation)
         else:
             messagebox.showwarning("警告", "没有找到可添加的有效图片文件")
 
-    def update_image_list(self):
-        """更新图片列表显示，增加点击选择功能"""
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+    def _finish_loading(self, pending, generation, added_count=0):
+        """按导入顺序把已加载完的图片分批加入列表，无需等待整批完成；缓存写入和列表刷新在主线程中进行"""
+        if generation != self._load_generation:
+            # 列表已被清空：取消尚未开始的加载，丢弃其余结果
+            for _, future, _ in pending:
+                if future is not None:
+                    future.cancel()
+            return
 
-        for i, item in enumerate(self.image_items):
-            item_frame = ttk.Frame(self.scrollable_frame, padding=5)
-            item_frame.grid(row=i, column=0, sticky="ew", pady=2)
+        ready = 0
+        while ready < len(pending) and (pending[ready][1] is None or pending[ready][1].done()):
+            ready += 1
 
-            # 添加选择状态指示
-            if item == self.current_preview_item:
-                item_frame.configure(style="Selected.TFrame")
+        if ready:
+            for image_item, future, stat in pending[:ready]:
+                self._pending_paths.discard(image_item.file_path)
+                try:
+                    if future is not None:
+                        png = future.result()
+                        if png:
+                            self.thumb_cache.put(image_item.file_path, stat, png, image_item.exif_date)
+                    self.image_items.append(image_item)
+                    self._paths_seen.add(image_item.file_path)
+                    added_count += 1
+                except Exception as e:
+                    print(f"无法添加文件 {image_item.file_path}: {e}")
+            del pending[:ready]
+            self.thumb_cache.commit()
+            self.update_image_list()
 
-            if item.thumbnail:
-                thumb_label = ttk.Label(item_frame, image=item.thumbnail)
-                thumb_label.grid(row=0, column=0, rowspan=2, padx=(0, 10))
-                # 绑定点击事件
-                thumb_label.bind("<Button-1>", lambda e, idx=i: self.select_image_for_preview(idx))
+        if pending:
+            self.status_label.config(text=f"正在加载... 已添加 {added_count} 个，剩余 {len(pending)} 个")
+            self.root.after(50, self._finish_loading, pending, generation, added_count)
+            return
+        self.status_label.config(text=f"已添加 {added_count} 个文件，总计 {len(self.image_items)} 个")
 
-            filename_label = ttk.Label(item_frame, text=item.file_path.name, font=("Segoe UI", 10, "bold"))
-            filename_label.grid(row=0, column=1, sticky="w")
-            # 绑定点击事件
-            filename_label.bind("<Button-1>", lambda e, idx=i: self.select_image_for_preview(idx))
+    def update_image_list(self):
+        """更新图片列表显示；行控件复用，只更新内容，不销毁重建"""
+        # 更新期间隐藏列表窗口，所有行配置完后只做一次布局计算
+        self._list_updating = True
+        self.canvas.itemconfigure(self._list_window_id, state="hidden")
+
+        # 行数不足时才创建新行
+        while len(self._row_widgets) < len(self.image_items):
+            self._row_widgets.append(self._create_row(len(self._row_widgets)))
+
+        for i, row in enumerate(self._row_widgets):
+            item = self.image_items[i] if i < len(self.image_items) else None
+            # 对应图片未变的行不做任何 Tk 调用，追加图片时只处理新增的行
+            if row["item"] is item:
+                continue
+            if row["shown"]:
+                row["item"].release_photo()
+                row["shown"] = False
+            row["item"] = item
+
+            if item is None:
+                row["frame"].grid_remove()
+                row["thumb"].configure(image="")
+                continue
+
+            row["frame"].grid(row=i, column=0, sticky="ew", pady=2)
+            if item.thumbnail_size:
+                # 先显示同尺寸的空白占位图，可见行的缩略图由 _sync_visible_thumbs 填入
+                row["thumb"].configure(image=self._thumb_placeholder(item.thumbnail_size))
+                row["thumb"].grid()
+            else:
+                row["thumb"].configure(image="")
+                row["thumb"].grid_remove()
 
+            row["name"].configure(text=item.file_path.name)
             exif_info = f"拍摄时间: {item.exif_date}" if item.exif_date else "无EXIF时间"
-            exif_label = ttk.Label(item_frame, text=exif_info, foreground="gray")
-            exif_label.grid(row=1, column=1, sticky="w")
-            # 绑定点击事件
-            exif_label.bind("<Button-1>", lambda e, idx=i: self.select_image_for_preview(idx))
-
-            # 为整个框架绑定点击事件
-            item_frame.bind("<Button-1>", lambda e, idx=i: self.select_image_for_preview(idx))
+            row["exif"].configure(text=exif_info)
+
+            # 添加选择状态指示；之后的选中变化由 _highlight_row 更新
+            row["frame"].configure(style="Selected.TFrame" if item == self.current_preview_item else "TFrame")
+
+        self.canvas.itemconfigure(self._list_window_id, state="normal")
+        self.canvas.update_idletasks()
+        self._list_updating = False
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        self._sync_visible_thumbs()
+
+    def _on_list_configure(self, event):
+        """列表尺寸变化时更新滚动区域；update_image_list 期间跳过，由其结束时统一设置"""
+        if not self._list_updating:
+            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
+    def _thumb_placeholder(self, size):
+        """同尺寸的缩略图共用一张空白占位图"""
+        placeholder = self._thumb_placeholders.get(size)
+        if placeholder is None:
+            placeholder = tk.PhotoImage(width=size[0], height=size[1])
+            self._thumb_placeholders[size] = placeholder
+        return placeholder
+
+    def _on_list_yview(self, first, last):
+        """列表滚动或内容变化时更新滚动条，并在空闲时刷新可见行的缩略图"""
+        self._list_scrollbar.set(first, last)
+        if self._thumb_sync_id is None:
+            self._thumb_sync_id = self.root.after_idle(self._sync_visible_thumbs)
+
+    def _sync_visible_thumbs(self):
+        """只为可见区域附近的行创建 PhotoImage，滚出的行换回占位图并释放，Tk 图像数量与列表长度无关"""
+        if self._thumb_sync_id is not None:
+            self.root.after_cancel(self._thumb_sync_id)
+            self._thumb_sync_id = None
+        count = len(self.image_items)
+        if not count:
+            return
+        # 各行高度基本一致，按滚动比例估算可见行号，前后各多留若干行
+        top, bottom = self.canvas.yview()
+        first = max(0, int(top * count) - 10)
+        last = min(count, int(bottom * count) + 11)
+        for i, row in enumerate(self._row_widgets[:count]):
+            item = row["item"]
+            if item is None or not item.thumbnail_size:
+                continue
+            visible = first <= i < last
+            if visible and not row["shown"]:
+                row["thumb"].configure(image=item.create_photo())
+                row["shown"] = True
+            elif not visible and row["shown"]:
+                row["thumb"].configure(image=self._thumb_placeholder(item.thumbnail_size))
+                item.release_photo()
+                row["shown"] = False
+
+    def _create_row(self, index):
+        """创建第 index 行的列表控件，点击事件按行号绑定"""
+        item_frame = ttk.Frame(self.scrollable_frame, padding=5)
+
+        thumb_label = ttk.Label(item_frame)
+        thumb_label.grid(row=0, column=0, rowspan=2, padx=(0, 10))
+
+        filename_label = ttk.Label(item_frame, font=("Segoe UI", 10, "bold"))
+        filename_label.grid(row=0, column=1, sticky="w")
+
+        exif_label = ttk.Label(item_frame, foreground="gray")
+        exif_label.grid(row=1, column=1, sticky="w")
+
+        # 为整行及其中的标签绑定点击事件
+        for widget in (item_frame, thumb_label, filename_label, exif_label):
+            widget.bind("<Button-1>", lambda e, idx=index: self.select_image_for_preview(idx))
+
+        return {"frame": item_frame, "thumb": thumb_label, "name": filename_label, "exif": exif_label, "item": None, "shown": False}
+
+    def _highlight_row(self, old_item, new_item):
+        """只更新前后两个选中行的样式"""
+        for item, style in ((old_item, "TFrame"), (new_item, "Selected.TFrame")):
+            if item in self.image_items:
+                index = self.image_items.index(item)
+                if index < len(self._row_widgets):
+                    self._row_widgets[index]["frame"].configure(style=style)
 
     def select_image_for_preview(self, index):
         """选择图片进行预览"""
         if 0 <= index < len(self.image_items):
+            old_item = self.current_preview_item
             self.current_preview_item = self.image_items[index]
             self.preview_scale = 1.0  # 重置缩放
             self.manual_position = False  # 重置手动位置
             self.watermark_x_offset = 0
             self.watermark_y_offset = 0
-            self.update_image_list()  # 更新列表显示选中状态
+            self._highlight_row(old_item, self.current_preview_item)  # 更新列表显示选中状态
+            # 代理图在首次拖拽时才生成（_render_drag_preview 内，有异常处理），选择图片时只交给后台线程渲染
             self.update_preview_image()
 
     def select_output_dir(self):
@@ -566,6 +1272,9 @@ class WatermarkGUI:
     def clear_list(self):
         """清空图片列表"""
         self.image_items.clear()
+        self._paths_seen.clear()
+        self._pending_paths.clear()
+        self._load_generation += 1
         self.update_image_list()
         self.status_label.config(text="列表已清空")
 
@@ -635,208 +1344,6 @@ class WatermarkGUI:
         if self.current_preview_item:
             self.update_preview_image()
 
-    def get_position_coordinates(self, image_size, watermark_size, position, manual_x=0, manual_y=0):
-        """根据位置参数计算水印坐标，支持手动位置"""
-        if position == "manual":
-            return (int(manual_x), int(manual_y))
-
-        img_width, img_height = image_size
-        wm_width, wm_height = watermark_size
-
-        positions = {
-            'top-left': (10, 10),
-            'top-center': ((img_width - wm_width) // 2, 10),
-            'top-right': (img_width - wm_width - 10, 10),
-            'center-left': (10, (img_height - wm_height) // 2),
-            'center': ((img_width - wm_width) // 2, (img_height - wm_height) // 2),
-            'center-right': (img_width - wm_width - 10, (img_height - wm_height) // 2),
-            'bottom-left': (10, img_height - wm_height - 10),
-            'bottom-center': ((img_width - wm_width) // 2, img_height - wm_height - 10),
-            'bottom-right': (img_width - wm_width - 10, img_height - wm_height - 10)
-        }
-        return positions.get(position, positions['bottom-right'])
-
-    def apply_text_watermark(self, image, params):
-        """应用文本水印"""
-        watermark_text = ""
-        if params["watermark_text_source"] == "EXIF Date":
-            if not params["image_item"].exif_date:
-                return None, "无EXIF拍摄时间"
-            watermark_text = params["image_item"].exif_date
-        else:  # Custom Text
-            if not params["custom_watermark_text"]:
-                return None, "自定义文本为空"
-            watermark_text = params["custom_watermark_text"]
-
-        draw = ImageDraw.Draw(image)
-        try:
-            font_paths = ["C:/Windows/Fonts/simhei.ttf", "C:/Windows/Fonts/msyh.ttc", "C:/Windows/Fonts/arial.ttf"]
-            font = next((ImageFont.truetype(fp, params["font_size"]) for fp in font_paths if os.path.exists(fp)), ImageFont.load_default())
-        except Exception:
-            font = ImageFont.load_default()
-
-        bbox = draw.textbbox((0, 0), watermark_text, font=font)
-        text_width, text_height = bbox[2] - bbox[0], bbox[3] - bbox[1]
-
-        # 计算位置（支持手动位置）
-        manual_x = params.get("manual_x", 0)
-        manual_y = params.get("manual_y", 0)
-        x, y = self.get_position_coordinates(image.size, (text_width, text_height), params["position"], manual_x, manual_y)
-
-        try:
-            rgb_color = Image.new("RGB", (1, 1), params["color"]).getpixel((0, 0))
-        except ValueError:
-            from PIL import ImageColor
-            rgb_color = ImageColor.getrgb(params["color"])
-
-        alpha = int(255 * (params["text_opacity"] / 100))
-        final_color = rgb_color + (alpha,)
-
-        # 创建文本水印图像
-        rotation_angle = params.get("rotation_angle", 0)
-        if rotation_angle != 0:
-            # 为旋转创建足够大的画布
-            max_dim = max(text_width, text_height) * 2
-            text_img = Image.new('RGBA', (max_dim, max_dim), (0, 0, 0, 0))
-            text_draw = ImageDraw.Draw(text_img)
-
-            # 在中心绘制文本
-            center_x = (max_dim - text_width) // 2
-            center_y = (max_dim - text_height) // 2
-
-            # 添加背景
-            padding = 5
-            text_draw.rectangle(
-                [center_x - padding, center_y - padding, center_x + text_width + padding, center_y + text_height + padding],
-                fill=(0, 0, 0, int(128 * (params["text_opacity"] / 100)))
-            )
-            text_draw.text((center_x, center_y), watermark_text, fill=final_color, font=font)
-
-            # 旋转文本图像
-            text_img = text_img.rotate(rotation_angle, expand=True)
-
-            # 计算旋转后的位置调整
-            rotated_width, rotated_height = text_img.size
-            paste_x = x - (rotated_width - text_width) // 2
-            paste_y = y - (rotated_height - text_height) // 2
-
-            # 粘贴到原图像
-            image.paste(text_img, (paste_x, paste_y), text_img)
-        else:
-            # 无旋转的情况
-            overlay = Image.new('RGBA', image.size, (0, 0, 0, 0))
-            overlay_draw = ImageDraw.Draw(overlay)
-            padding = 5
-            overlay_draw.rectangle(
-                [x - padding, y - padding, x + text_width + padding, y + text_height + padding],
-                fill=(0, 0, 0, int(128 * (params["text_opacity"] / 100)))
-            )
-            image = Image.alpha_composite(image, overlay)
-
-            final_draw = ImageDraw.Draw(image)
-            final_draw.text((x, y), watermark_text, fill=final_color, font=font)
-
-        return image, "成功"
-
-    def apply_image_watermark(self, image, params):
-        """应用图片水印"""
-        watermark_path = params["image_watermark_path"]
-        if not watermark_path or not Path(watermark_path).exists():
-            return None, "水印图片路径无效"
-
-        with Image.open(watermark_path).convert("RGBA") as watermark:
-            # 调整水印透明度
-            if params["image_opacity"] < 100:
-                alpha = watermark.split()[3]
-                alpha = ImageEnhance.Brightness(alpha).enhance(params["image_opacity"] / 100)
-                watermark.putalpha(alpha)
-
-            # 调整水印大小
-            scale_percent = params["image_scale"]
-            base_width = image.size[0]
-            w_width, w_height = watermark.size
-            target_width = int(base_width * (scale_percent / 100))
-            w_ratio = w_height / w_width
-            target_height = int(target_width * w_ratio)
-            watermark = watermark.resize((target_width, target_height), Image.Resampling.LANCZOS)
-
-            # 应用旋转
-            rotation_angle = params.get("rotation_angle", 0)
-            if rotation_angle != 0:
-                watermark = watermark.rotate(rotation_angle, expand=True)
-
-            # 计算位置并粘贴（支持手动位置）
-            manual_x = params.get("manual_x", 0)
-            manual_y = params.get("manual_y", 0)
-            x, y = self.get_position_coordinates(image.size, watermark.size, params["position"], manual_x, manual_y)
-
-            # 创建一个透明层来粘贴水印
-            overlay = Image.new('RGBA', image.size, (0, 0, 0, 0))
-            overlay.paste(watermark, (x, y), watermark)
-
-            # 合成
-            image = Image.alpha_composite(image, overlay)
-
-        return image, "成功"
-
-
-    def process_single_image(self, image_item, output_dir, **params):
-        """处理单张图片"""
-        try:
-            with Image.open(image_item.file_path) as image:
-                original_mode = image.mode
-
-                # 调整尺寸
-                if params["resize_option"] != '不缩放':
-                    w, h = image.size
-                    if params["resize_option"] == '按宽度':
-                        new_w = params["resize_value"]
-                        new_h = int(h * (new_w / w))
-                    elif params["resize_option"] == '按高度':
-                        new_h = params["resize_value"]
-                        new_w = int(w * (new_h / h))
-                    elif params["resize_option"] == '按百分比':
-                        new_w = int(w * params["resize_value"] / 100)
-                        new_h = int(h * params["resize_value"] / 100)
-                    else:
-                        new_w, new_h = w, h
-                    image = image.resize((new_w, new_h), Image.Resampling.LANCZOS)
-
-                # 统一转换为RGBA进行处理
-                if image.mode != 'RGBA':
-                    image = image.convert('RGBA')
-
-                # 应用水印
-                params["image_item"] = image_item
-                if params["watermark_type"] == "Text":
-                    image, message = self.apply_text_watermark(image, params)
-                else: # Image
-                    image, message = self.apply_image_watermark(image, params)
-
-                if image is None:
-                    return False, message
-
-                # 根据输出格式进行转换和保存
-                output_ext = '.jpg' if params["output_format"] == 'JPEG' else '.png'
-                new_filename = f"{params['prefix']}{image_item.file_path.stem}{params['suffix']}{output_ext}"
-                output_path = output_dir / new_filename
-
-                if params["output_format"] == 'JPEG':
-                    if image.mode in ('RGBA', 'LA'):
-                        background = Image.new('RGB', image.size, (255, 255, 255))
-                        background.paste(image, mask=image.split()[-1])
-                        image = background
-                    else:
-                        image = image.convert('RGB')
-                    image.save(output_path, 'JPEG', quality=params["quality"], optimize=True)
-                else: # PNG
-                    image.save(output_path, 'PNG', optimize=True)
-
-                return True, "成功"
-
-        except Exception as e:
-            return False, str(e)
-
     def process_images(self):
         """处理所有图片"""
         if not self.image_items:
@@ -879,28 +1386,61 @@ class WatermarkGUI:
             # 输出
             "output_format": self.output_format.get(),
             "quality": self.output_quality.get(),
+            "fast_save": self.fast_save.get(),
+            "jpeg_optimize": self.jpeg_optimize.get(),
             "prefix": self.filename_prefix.get(),
             "suffix": self.filename_suffix.get(),
             "resize_option": self.resize_option.get(),
             "resize_value": self.resize_value.get(),
         }
 
+        # 在主线程中取出任务所需的数据，子进程不接触 Tk 对象
+        tasks = [(item.file_path, item.exif_date) for item in self.image_items]
+        font_path = self._font_path
+        total_count = len(tasks)
+        self.progress.config(maximum=total_count)
+
         def process_thread():
             success_count = 0
-            total_count = len(self.image_items)
-            self.progress.config(maximum=total_count)
+            done_count = 0
+            last_ui_update = 0.0
 
-            for i, item in enumerate(self.image_items):
-                self.root.after(0, lambda i=i: self.status_label.config(text=f"正在处理 {i+1}/{total_count}: {item.file_path.name}"))
+            try:
+                if total_count < PROCESS_POOL_MIN_TASKS:
+                    pool = ThreadPoolExecutor(max_workers=min(total_count, os.cpu_count() or 1))
+                    submit = functools.partial(pool.submit, _process_single_image,
+                                               output_dir=output_dir, font_path=font_path, params=params)
+                else:
+                    # max_workers=None：由执行器按 CPU 核心数决定，并遵守 Windows 最多 61 个进程的限制
+                    pool = ProcessPoolExecutor(max_workers=None, initializer=_init_batch_worker,
+                                               initargs=(output_dir, font_path, params))
+                    submit = functools.partial(pool.submit, _process_batch_item)
+            except Exception as e:
+                print(f"无法启动批量处理: {e}")
+                self.root.after(0, lambda e=e: self.status_label.config(text=f"处理失败: {e}"))
+                self.root.after(0, lambda e=e: messagebox.showerror("错误", f"无法启动批量处理: {e}"))
+                return
 
-                success, message = self.process_single_image(item, output_dir, **params)
+            with pool:
+                futures = {submit(file_path, exif_date): file_path for file_path, exif_date in tasks}
+                for future in as_completed(futures):
+                    file_path = futures[future]
+                    try:
+                        success, message = future.result()
+                    except Exception as e:
+                        success, message = False, str(e)
 
-                if success:
-                    success_count += 1
-                else:
-                    print(f"处理 {item.file_path.name} 失败: {message}")
+                    done_count += 1
+                    if success:
+                        success_count += 1
+                    else:
+                        print(f"处理 {file_path.name} 失败: {message}")
 
-                self.root.after(0, lambda v=i+1: self.progress.config(value=v))
+                    # 最多每 50ms 刷新一次界面，最后一张总会刷新
+                    now = time.monotonic()
+                    if now - last_ui_update > 0.05 or done_count == total_count:
+                        last_ui_update = now
+                        self.root.after(0, self._update_progress, done_count, total_count, file_path.name)
 
             self.root.after(0, lambda: self.status_label.config(
                 text=f"处理完成: 成功 {success_count}/{total_count} 个文件，输出到: {output_dir}"
@@ -911,6 +1451,11 @@ class WatermarkGUI:
 
         threading.Thread(target=process_thread, daemon=True).start()
 
+    def _update_progress(self, done_count, total_count, name):
+        """在主线程中同时更新进度条和状态文本"""
+        self.status_label.config(text=f"已处理 {done_count}/{total_count}: {name}")
+        self.progress.config(value=done_count)
+
     def on_mouse_wheel(self, event):
         """处理鼠标滚轮事件"""
         if self.preview_canvas.winfo_height() > 0:
@@ -921,10 +1466,74 @@ class WatermarkGUI:
             # 限制缩放范围
             if 0.1 <= new_scale <= 10:
                 self.preview_scale = new_scale
-                self.update_preview_image()
-
-    def update_preview_image(self):
-        """更新预览图像"""
+                self._mark_dirty()
+
+    def on_list_mouse_wheel(self, event):
+        """处理图片列表的滚轮事件"""
+        self.canvas.yview_scroll(-1 if event.delta > 0 else 1, "units")
+
+    def _on_list_leave(self, event):
+        """指针离开列表时取消滚轮绑定；移到画布内嵌的行控件上时画布也会收到 Leave（NotifyInferior），此时保留绑定"""
+        if event.detail != "NotifyInferior":
+            self.canvas.unbind_all("<MouseWheel>")
+
+    def _get_original_size(self):
+        """返回当前预览图片的原图尺寸；未记录时只读取文件头"""
+        item = self.current_preview_item
+        if item.original_size is None:
+            with Image.open(item.file_path) as img:
+                item.original_size = img.size
+        return item.original_size
+
+    def _get_preview_proxy(self):
+        """返回当前预览图片的低分辨率代理图"""
+        item = self.current_preview_item
+        if self._preview_proxy_item is not item:
+            with Image.open(item.file_path) as img:
+                item.original_size = img.size
+                img.draft('RGB', (1600, 1600))
+                # 先整数倍快速缩小（非 JPEG 无法 draft 时效果明显），再做一次双线性缩放
+                working_mode = _working_mode(img)
+                factor = max(1, min(img.width // 1200, img.height // 1200))
+                proxy = img
+                if factor > 1:
+                    # reduce() 不支持 P、1、I;16 等模式，这些图片先转换为工作模式
+                    if proxy.mode not in ('L', 'LA', 'RGB', 'RGBA', 'CMYK'):
+                        proxy = proxy.convert(working_mode)
+                    proxy = proxy.reduce(factor)
+                proxy.thumbnail((800, 800), Image.Resampling.BILINEAR)
+                self._preview_proxy = proxy.convert(working_mode)
+            self._preview_proxy_item = item
+        return self._preview_proxy
+
+    def _render_drag_preview(self, params, canvas_width, canvas_height):
+        """拖拽时的快速预览：缩放好的底图和水印图层按参数缓存，每帧只复制底图并合成图层"""
+        item = self.current_preview_item
+        original_size = self._get_original_size()
+        display_size = _preview_display_size(original_size, canvas_width, canvas_height, self.preview_scale)
+        display_scale = display_size[0] / original_size[0]
+
+        # 拖拽只改变手动位置，其余参数不变时复用缓存
+        key = (item, display_size, tuple((k, v) for k, v in params.items() if k not in ("manual_x", "manual_y")))
+        if self._drag_cache_key != key:
+            proxy = self._get_preview_proxy()
+            base = proxy.resize(display_size, Image.Resampling.BILINEAR) if proxy.size != display_size else proxy
+            tile_params = dict(params, font_size=max(1, round(params["font_size"] * display_scale)))
+            self._drag_cache = (base, _render_watermark_tile(display_size[0], tile_params, self._font_path))
+            self._drag_cache_key = key
+
+        base, (tile, offset, size, message) = self._drag_cache
+        if tile is None:
+            return None, message
+
+        img = base.copy()
+        x, y = _get_position_coordinates(img.size, size, params["position"],
+                                         params["manual_x"] * display_scale, params["manual_y"] * display_scale)
+        _composite_at(img, tile, x + offset[0], y + offset[1])
+        return img, "成功"
+
+    def update_preview_image(self, use_proxy=False):
+        """更新预览图像；完整渲染交给后台线程，use_proxy 为 True 时用代理图和缓存的水印图层在主线程快速合成（拖拽时使用）"""
         if not self.current_preview_item:
             self.preview_canvas.delete("all")
             self.preview_status_label.config(text="请选择图片以查看预览")
@@ -932,85 +1541,107 @@ class WatermarkGUI:
             return
 
         try:
-            with Image.open(self.current_preview_item.file_path) as img:
-                img = img.convert("RGBA")
-                original_size = img.size
-
-                # 应用水印
-                params = {
-                    "watermark_type": self.watermark_type.get(),
-                    "font_size": self.font_size.get(),
-                    "color": self.color.get(),
-                    "text_opacity": self.text_opacity.get(),
-                    "watermark_text_source": self.watermark_text_source.get(),
-                    "custom_watermark_text": self.custom_watermark_text.get(),
-                    "image_watermark_path": self.image_watermark_path.get(),
-                    "image_opacity": self.image_opacity.get(),
-                    "image_scale": self.image_scale.get(),
-                    "position": self.position.get() if not self.manual_position else "manual",
-                    "rotation_angle": self.rotation_angle.get(),
-                    "image_item": self.current_preview_item,
-                    "manual_x": self.watermark_x_offset if self.manual_position else 0,
-                    "manual_y": self.watermark_y_offset if self.manual_position else 0,
-                }
-
-                if params["watermark_type"] == "Text":
-                    img, message = self.apply_text_watermark(img, params)
-                else:
-                    img, message = self.apply_image_watermark(img, params)
-
-                if img is None:
-                    self.preview_status_label.config(text=f"预览错误: {message}")
-                    return
-
-                # 不对整个图像进行旋转，旋转只应用于水印
-
-                # 自适应画布大小
-                canvas_width = self.preview_canvas.winfo_width()
-                canvas_height = self.preview_canvas.winfo_height()
-
-                if canvas_width > 1 and canvas_height > 1:
-                    # 计算适合画布的缩放比例
-                    scale_x = canvas_width / img.size[0]
-                    scale_y = canvas_height / img.size[1]
-                    auto_scale = min(scale_x, scale_y, 1.0)  # 不放大，只缩小
-
-                    # 应用用户缩放
-                    final_scale = auto_scale * self.preview_scale
-
-                    if final_scale != 1.0:
-                        new_size = (int(img.size[0] * final_scale), int(img.size[1] * final_scale))
-                        img = img.resize(new_size, Image.Resampling.LANCZOS)
-
-                self.preview_image = img
-                self.preview_photo = ImageTk.PhotoImage(img)
-
-                # 更新画布
-                self.preview_canvas.delete("all")
-                self.preview_canvas.create_image(
-                    canvas_width // 2 if canvas_width > 1 else 0,
-                    canvas_height // 2 if canvas_height > 1 else 0,
-                    image=self.preview_photo,
-                    anchor="center"
-                )
-                self.preview_canvas.config(scrollregion=self.preview_canvas.bbox("all"))
-
-                # 更新状态标签
-                self.preview_status_label.config(text=f"预览: {self.current_preview_item.file_path.name}")
-                scale_info = f"缩放: {self.preview_scale:.1f}x" if self.preview_scale != 1.0 else ""
-                rotation_info = f"旋转: {self.rotation_angle.get()}°" if self.rotation_angle.get() != 0 else ""
-                position_info = "手动位置" if self.manual_position else f"预设位置: {self.position.get()}"
-                info_parts = [f"原始: {original_size[0]}x{original_size[1]}"]
-                if scale_info:
-                    info_parts.append(scale_info)
-                if rotation_info:
-                    info_parts.append(rotation_info)
-                info_parts.append(position_info)
-                self.preview_image_label.config(text=" | ".join(info_parts))
-
+            params = {
+                "watermark_type": self.watermark_type.get(),
+                "font_size": self.font_size.get(),
+                "color": self.color.get(),
+                "text_opacity": self.text_opacity.get(),
+                "watermark_text_source": self.watermark_text_source.get(),
+                "custom_watermark_text": self.custom_watermark_text.get(),
+                "image_watermark_path": self.image_watermark_path.get(),
+                "image_opacity": self.image_opacity.get(),
+                "image_scale": self.image_scale.get(),
+                "position": self.position.get() if not self.manual_position else "manual",
+                "rotation_angle": self.rotation_angle.get(),
+                "exif_date": self.current_preview_item.exif_date,
+                "manual_x": self.watermark_x_offset if self.manual_position else 0,
+                "manual_y": self.watermark_y_offset if self.manual_position else 0,
+            }
         except Exception as e:
             print(f"更新预览图像时出错: {e}")
             self.preview_status_label.config(text=f"预览错误: {str(e)}")
+            return
+
+        # 自适应画布大小
+        canvas_width = self.preview_canvas.winfo_width()
+        canvas_height = self.preview_canvas.winfo_height()
+
+        self._render_seq += 1
+        if use_proxy:
+            try:
+                original_size = self._get_original_size()
+                img, message = self._render_drag_preview(params, canvas_width, canvas_height)
+            except Exception as e:
+                print(f"更新预览图像时出错: {e}")
+                img, message, original_size = None, str(e), None
+            self._show_preview(self._render_seq, img, message, original_size, True)
+        else:
+            # 只保留最新的请求，后台线程忙时旧请求直接被覆盖
+            with self._render_cond:
+                self._render_request = (self._render_seq, (
+                    self.current_preview_item.file_path, params, self._font_path,
+                    canvas_width, canvas_height, self.preview_scale,
+                ))
+                self._render_cond.notify()
+
+    def _preview_worker(self):
+        """预览渲染线程：循环取出最新的渲染请求，完成后回到主线程显示"""
+        while True:
+            with self._render_cond:
+                while self._render_request is None:
+                    self._render_cond.wait()
+                seq, args = self._render_request
+                self._render_request = None
+
+            try:
+                img, message, original_size = _render_preview(*args)
+            except Exception as e:
+                print(f"更新预览图像时出错: {e}")
+                img, message, original_size = None, str(e), None
+
+            try:
+                self.root.after(0, self._show_preview, seq, img, message, original_size, False)
+            except Exception:
+                # 窗口已关闭
+                return
+
+    def _show_preview(self, seq, img, message, original_size, from_proxy):
+        """在主线程中把渲染结果转换为 PhotoImage 并显示；过期的结果直接丢弃"""
+        if seq != self._render_seq:
+            return
+        if img is None:
+            self.preview_status_label.config(text=f"预览错误: {message}")
+            return
+
+        canvas_width = self.preview_canvas.winfo_width()
+        canvas_height = self.preview_canvas.winfo_height()
+
+        self._proxy_shown = from_proxy
+        self.preview_image = img
+        self.preview_photo = ImageTk.PhotoImage(img)
+
+        # 更新画布
+        self.preview_canvas.delete("all")
+        self.preview_canvas.create_image(
+            canvas_width // 2 if canvas_width > 1 else 0,
+            canvas_height // 2 if canvas_height > 1 else 0,
+            image=self.preview_photo,
+            anchor="center"
+        )
+        self.preview_canvas.config(scrollregion=self.preview_canvas.bbox("all"))
+
+        # 更新状态标签
+        self.preview_status_label.config(text=f"预览: {self.current_preview_item.file_path.name}")
+        scale_info = f"缩放: {self.preview_scale:.1f}x" if self.preview_scale != 1.0 else ""
+        rotation_info = f"旋转: {self.rotation_angle.get()}°" if self.rotation_angle.get() != 0 else ""
+        position_info = "手动位置" if self.manual_position else f"预设位置: {self.position.get()}"
+        info_parts = [f"原始: {original_size[0]}x{original_size[1]}"]
+        if scale_info:
+            info_parts.append(scale_info)
+        if rotation_info:
+            info_parts.append(rotation_info)
+        info_parts.append(position_info)
+        self.preview_image_label.config(text=" | ".join(info_parts))
 
     def on_preview_click(self, event):
         """处理预览区域点击事件"""
@@ -1043,30 +1674,36 @@ class WatermarkGUI:
 
                     if canvas_width_orig > 1 and canvas_height_orig > 1:
                         # 计算原始图像大小
-                        with Image.open(self.current_preview_item.file_path) as orig_img:
-                            orig_width, orig_height = orig_img.size
+                        orig_width, orig_height = self._get_original_size()
 
-                            # 计算缩放比例
-                            scale_x = canvas_width_orig / orig_width
-                            scale_y = canvas_height_orig / orig_height
-                            auto_scale = min(scale_x, scale_y, 1.0)
-                            final_scale = auto_scale * self.preview_scale
+                        # 计算缩放比例
+                        scale_x = canvas_width_orig / orig_width
+                        scale_y = canvas_height_orig / orig_height
+                        auto_scale = min(scale_x, scale_y, 1.0)
+                        final_scale = auto_scale * self.preview_scale
 
-                            # 转换坐标到原始图像
-                            orig_x = int(relative_x / final_scale)
-                            orig_y = int(relative_y / final_scale)
+                        # 转换坐标到原始图像
+                        orig_x = int(relative_x / final_scale)
+                        orig_y = int(relative_y / final_scale)
 
-                            # 设置水印位置
-                            self.watermark_x_offset = orig_x
-                            self.watermark_y_offset = orig_y
-                            self.manual_position = True
+                        # 设置水印位置
+                        self.watermark_x_offset = orig_x
+                        self.watermark_y_offset = orig_y
+                        self.manual_position = True
 
-                            # 更新预览
-                            self.update_preview_image()
+                        # 更新预览
+                        self.update_preview_image()
 
     def on_preview_release(self, event):
-        """处理预览区域释放事件"""
+        """处理预览区域释放事件；拖拽结束后在原图上重新渲染一次"""
         self.is_dragging = False
+        if self._preview_after_id:
+            self.root.after_cancel(self._preview_after_id)
+            self._preview_after_id = None
+            self._dirty = False
+        elif not self._proxy_shown:
+            return
+        self.update_preview_image()
 
     def on_preview_drag(self, event):
         """处理预览区域拖拽事件"""
@@ -1080,30 +1717,29 @@ class WatermarkGUI:
             canvas_height = self.preview_canvas.winfo_height()
 
             if canvas_width > 1 and canvas_height > 1:
-                with Image.open(self.current_preview_item.file_path) as orig_img:
-                    orig_width, orig_height = orig_img.size
+                orig_width, orig_height = self._get_original_size()
 
-                    # 计算缩放比例
-                    scale_x = canvas_width / orig_width
-                    scale_y = canvas_height / orig_height
-                    auto_scale = min(scale_x, scale_y, 1.0)
-                    final_scale = auto_scale * self.preview_scale
+                # 计算缩放比例
+                scale_x = canvas_width / orig_width
+                scale_y = canvas_height / orig_height
+                auto_scale = min(scale_x, scale_y, 1.0)
+                final_scale = auto_scale * self.preview_scale
 
-                    # 转换拖拽距离到原始图像坐标
-                    orig_dx = dx / final_scale
-                    orig_dy = dy / final_scale
+                # 转换拖拽距离到原始图像坐标
+                orig_dx = dx / final_scale
+                orig_dy = dy / final_scale
 
-                    # 更新水印位置
-                    self.watermark_x_offset += orig_dx
-                    self.watermark_y_offset += orig_dy
-                    self.manual_position = True
+                # 更新水印位置
+                self.watermark_x_offset += orig_dx
+                self.watermark_y_offset += orig_dy
+                self.manual_position = True
 
             # 更新拖拽起始点
             self.drag_start_x = event.x
             self.drag_start_y = event.y
 
-            # 更新预览图像
-            self.update_preview_image()
+            # 更新预览图像（合并连续的拖拽事件，拖拽中使用代理图）
+            self._mark_dirty()
 
     def reset_preview(self, event=None):
         """重置预览为原始状态"""
@@ -1125,19 +1761,33 @@ class WatermarkGUI:
         if self.current_preview_item:
             self.update_preview_image()
 
+    def _mark_dirty(self, *args):
+        """标记预览需要刷新；30ms 内的多次变化只渲染一次"""
+        self._dirty = True
+        if not self._preview_after_id:
+            self._preview_after_id = self.root.after(30, self._preview_pump)
+
+    def _on_preview_var_changed(self, *args):
+        """界面变量变化后延迟 100ms 刷新预览，连续输入时每次变化重新计时，只渲染最后一次"""
+        self._dirty = True
+        if self._preview_after_id:
+            self.root.after_cancel(self._preview_after_id)
+        self._preview_after_id = self.root.after(100, self._preview_pump)
+
+    def _preview_pump(self):
+        """执行被合并的预览刷新"""
+        self._preview_after_id = None
+        if self._dirty and self.current_preview_item:
+            self._dirty = False
+            self.update_preview_image(use_proxy=self.is_dragging)
+
     def bind_preview_events(self):
-        """绑定预览相关变量的变化事件"""
-        self.watermark_type.trace_add("write", lambda *args: self.update_preview_image())
-        self.font_size.trace_add("write", lambda *args: self.update_preview_image())
-        self.color.trace_add("write", lambda *args: self.update_preview_image())
-        self.text_opacity.trace_add("write", lambda *args: self.update_preview_image())
-        self.watermark_text_source.trace_add("write", lambda *args: self.update_preview_image())
-        self.custom_watermark_text.trace_add("write", lambda *args: self.update_preview_image())
-        self.image_watermark_path.trace_add("write", lambda *args: self.update_preview_image())
-        self.image_opacity.trace_add("write", lambda *args: self.update_preview_image())
-        self.image_scale.trace_add("write", lambda *args: self.update_preview_image())
+        """绑定预览相关变量的变化事件，所有变量共用一个脏标记和防抖定时器"""
         # 注意：position的变化事件已经在ComboboxSelected中处理，这里不需要重复绑定
-        self.rotation_angle.trace_add("write", lambda *args: self.update_preview_image())
+        for var in (self.watermark_type, self.font_size, self.color, self.text_opacity,
+                    self.watermark_text_source, self.custom_watermark_text, self.image_watermark_path,
+                    self.image_opacity, self.image_scale, self.rotation_angle):
+            var.trace_add("write", self._on_preview_var_changed)
 
         # 绑定选择图片后更新预览
         self.scrollable_frame.bind("<ButtonRelease-1>", self.on_image_select)
@@ -1154,50 +1804,59 @@ class WatermarkGUI:
                 self.update_preview_image()
 
     def load_last_settings(self):
-        """加载上次的设置"""
+        """在后台线程读取上次的设置，读取完成后回到主线程应用"""
         if not self.settings_file.exists():
             return
 
-        try:
-            with open(self.settings_file, "r", encoding="utf-8") as f:
-                settings = json.load(f)
-
-            # 恢复所有设置参数
-            self.watermark_type.set(settings.get("watermark_type", "Text"))
-
-            # 文本水印设置
-            self.font_size.set(settings.get("font_size", 36))
-            self.color.set(settings.get("color", "white"))
-            self.text_opacity.set(settings.get("text_opacity", 100))
-            self.watermark_text_source.set(settings.get("watermark_text_source", "EXIF Date"))
-            self.custom_watermark_text.set(settings.get("custom_watermark_text", "自定义水印"))
-
-            # 图片水印设置
-            self.image_watermark_path.set(settings.get("image_watermark_path", ""))
-            self.image_opacity.set(settings.get("image_opacity", 100))
-            self.image_scale.set(settings.get("image_scale", 20))
-
-            # 通用与输出设置
-            self.position.set(settings.get("position", "bottom-right"))
-            self.rotation_angle.set(settings.get("rotation_angle", 0))
-            self.output_format.set(settings.get("output_format", "JPEG"))
-            self.output_quality.set(settings.get("output_quality", 95))
-            self.output_dir.set(settings.get("output_dir", ""))
-            self.filename_prefix.set(settings.get("filename_prefix", ""))
-            self.filename_suffix.set(settings.get("filename_suffix", "_watermarked"))
-            self.resize_option.set(settings.get("resize_option", "不缩放"))
-            self.resize_value.set(settings.get("resize_value", 100))
-
-            # 手动位置
-            self.manual_position = settings.get("manual_position", False)
-            self.watermark_x_offset = settings.get("watermark_x_offset", 0)
-            self.watermark_y_offset = settings.get("watermark_y_offset", 0)
-
-            # 加载后同步UI显示
-            self._sync_ui_after_load_settings()
-
-        except Exception as e:
-            print(f"加载设置时出错: {e}")
+        def load_thread():
+            try:
+                with open(self.settings_file, "r", encoding="utf-8") as f:
+                    settings = json.load(f)
+            except Exception as e:
+                print(f"加载设置时出错: {e}")
+                return
+            self._saved_settings = settings
+            self.root.after(0, self._apply_settings, settings)
+
+        threading.Thread(target=load_thread, daemon=True).start()
+
+    def _apply_settings(self, settings):
+        """把设置字典应用到界面变量（主线程调用）"""
+        # 恢复所有设置参数
+        self.watermark_type.set(settings.get("watermark_type", "Text"))
+
+        # 文本水印设置
+        self.font_size.set(settings.get("font_size", 36))
+        self.color.set(settings.get("color", "white"))
+        self.text_opacity.set(settings.get("text_opacity", 100))
+        self.watermark_text_source.set(settings.get("watermark_text_source", "EXIF Date"))
+        self.custom_watermark_text.set(settings.get("custom_watermark_text", "自定义水印"))
+
+        # 图片水印设置
+        self.image_watermark_path.set(settings.get("image_watermark_path", ""))
+        self.image_opacity.set(settings.get("image_opacity", 100))
+        self.image_scale.set(settings.get("image_scale", 20))
+
+        # 通用与输出设置
+        self.position.set(settings.get("position", "bottom-right"))
+        self.rotation_angle.set(settings.get("rotation_angle", 0))
+        self.output_format.set(settings.get("output_format", "JPEG"))
+        self.output_quality.set(settings.get("output_quality", 95))
+        self.fast_save.set(settings.get("fast_save", False))
+        self.jpeg_optimize.set(settings.get("jpeg_optimize", False))
+        self.output_dir.set(settings.get("output_dir", ""))
+        self.filename_prefix.set(settings.get("filename_prefix", ""))
+        self.filename_suffix.set(settings.get("filename_suffix", "_watermarked"))
+        self.resize_option.set(settings.get("resize_option", "不缩放"))
+        self.resize_value.set(settings.get("resize_value", 100))
+
+        # 手动位置
+        self.manual_position = settings.get("manual_position", False)
+        self.watermark_x_offset = settings.get("watermark_x_offset", 0)
+        self.watermark_y_offset = settings.get("watermark_y_offset", 0)
+
+        # 加载后同步UI显示
+        self._sync_ui_after_load_settings()
 
     def _sync_ui_after_load_settings(self):
         """加载设置后同步UI显示"""
@@ -1213,98 +1872,101 @@ class WatermarkGUI:
         if hasattr(self, 'on_text_source_change'):
             self.on_text_source_change()
 
+    def _collect_settings(self):
+        """收集当前界面设置为字典（主线程调用）"""
+        return {
+            "watermark_type": self.watermark_type.get(),
+            "font_size": self.font_size.get(),
+            "color": self.color.get(),
+            "text_opacity": self.text_opacity.get(),
+            "watermark_text_source": self.watermark_text_source.get(),
+            "custom_watermark_text": self.custom_watermark_text.get(),
+            "image_watermark_path": self.image_watermark_path.get(),
+            "image_opacity": self.image_opacity.get(),
+            "image_scale": self.image_scale.get(),
+            "position": self.position.get(),
+            "rotation_angle": self.rotation_angle.get(),
+            # 添加手动位置信息
+            "manual_position": self.manual_position,
+            "watermark_x_offset": self.watermark_x_offset,
+            "watermark_y_offset": self.watermark_y_offset,
+            "output_format": self.output_format.get(),
+            "output_quality": self.output_quality.get(),
+            "fast_save": self.fast_save.get(),
+            "jpeg_optimize": self.jpeg_optimize.get(),
+            "output_dir": self.output_dir.get(),
+            "filename_prefix": self.filename_prefix.get(),
+            "filename_suffix": self.filename_suffix.get(),
+            "resize_option": self.resize_option.get(),
+            "resize_value": self.resize_value.get(),
+        }
+
     def save_settings(self):
-        """保存当前设置为模板"""
-        try:
-            settings = {
-                "watermark_type": self.watermark_type.get(),
-                "font_size": self.font_size.get(),
-                "color": self.color.get(),
-                "text_opacity": self.text_opacity.get(),
-                "watermark_text_source": self.watermark_text_source.get(),
-                "custom_watermark_text": self.custom_watermark_text.get(),
-                "image_watermark_path": self.image_watermark_path.get(),
-                "image_opacity": self.image_opacity.get(),
-                "image_scale": self.image_scale.get(),
-                "position": self.position.get(),
-                "rotation_angle": self.rotation_angle.get(),
-                # 添加手动位置信息
-                "manual_position": self.manual_position,
-                "watermark_x_offset": self.watermark_x_offset,
-                "watermark_y_offset": self.watermark_y_offset,
-                "output_format": self.output_format.get(),
-                "output_quality": self.output_quality.get(),
-                "output_dir": self.output_dir.get(),
-                "filename_prefix": self.filename_prefix.get(),
-                "filename_suffix": self.filename_suffix.get(),
-                "resize_option": self.resize_option.get(),
-                "resize_value": self.resize_value.get(),
-            }
+        """保存当前设置为模板，文件写入在后台线程进行"""
+        settings = self._collect_settings()
 
-            # 使用当前时间戳作为模板文件名
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            template_file = self.templates_dir / f"template_{timestamp}.json"
+        # 使用当前时间戳作为模板文件名
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        template_file = self.templates_dir / f"template_{timestamp}.json"
 
-            with open(template_file, "w", encoding="utf-8") as f:
-                json.dump(settings, f, ensure_ascii=False, indent=4)
+        def save_thread():
+            try:
+                _write_json_atomic(template_file, settings)
+            except Exception as e:
+                self.root.after(0, lambda e=e: messagebox.showerror("保存模板", f"保存设置时出错: {e}"))
+                return
+            self.root.after(0, lambda: messagebox.showinfo("保存模板", f"设置已保存为模板: {template_file.name}"))
 
-            messagebox.showinfo("保存模板", f"设置已保存为模板: {template_file.name}")
-        except Exception as e:
-            messagebox.showerror("保存模板", f"保存设置时出错: {e}")
+        threading.Thread(target=save_thread, daemon=True).start()
 
     def apply_template(self, template_path):
-        """应用模板设置"""
+        """在后台线程读取模板，读取完成后回到主线程应用"""
+        def load_thread():
+            try:
+                # 文件未修改时复用上次解析的结果
+                mtime_ns = os.stat(template_path).st_mtime_ns
+                cached = self._template_cache.get(str(template_path))
+                if cached and cached[0] == mtime_ns:
+                    settings = cached[1]
+                else:
+                    with open(template_path, "r", encoding="utf-8") as f:
+                        settings = json.load(f)
+                    self._template_cache[str(template_path)] = (mtime_ns, settings)
+            except Exception as e:
+                self.root.after(0, lambda e=e: messagebox.showerror("应用模板", f"加载模板时出错: {e}"))
+                return
+            self.root.after(0, self._apply_template_settings, settings, Path(template_path).name)
+
+        threading.Thread(target=load_thread, daemon=True).start()
+
+    def _apply_template_settings(self, settings, template_name):
+        """应用已读取的模板设置（主线程调用）"""
         try:
-            with open(template_path, "r", encoding="utf-8") as f:
-                settings = json.load(f)
-
-            # 应用所有设置参数，不论水印类型
-            self.watermark_type.set(settings.get("watermark_type", "Text"))
-
-            # 文本水印设置
-            self.font_size.set(settings.get("font_size", 36))
-            self.color.set(settings.get("color", "white"))
-            self.text_opacity.set(settings.get("text_opacity", 100))
-            self.watermark_text_source.set(settings.get("watermark_text_source", "EXIF Date"))
-            self.custom_watermark_text.set(settings.get("custom_watermark_text", "自定义水印"))
-
-            # 图片水印设置
-            self.image_watermark_path.set(settings.get("image_watermark_path", ""))
-            self.image_opacity.set(settings.get("image_opacity", 100))
-            self.image_scale.set(settings.get("image_scale", 20))
-
-            # 通用与输出设置
-            self.position.set(settings.get("position", "bottom-right"))
-            self.rotation_angle.set(settings.get("rotation_angle", 0))
-            self.output_format.set(settings.get("output_format", "JPEG"))
-            self.output_quality.set(settings.get("output_quality", 95))
-            self.output_dir.set(settings.get("output_dir", ""))
-            self.filename_prefix.set(settings.get("filename_prefix", ""))
-            self.filename_suffix.set(settings.get("filename_suffix", "_watermarked"))
-            self.resize_option.set(settings.get("resize_option", "不缩放"))
-            self.resize_value.set(settings.get("resize_value", 100))
-
-            # 恢复手动位置信息
-            self.manual_position = settings.get("manual_position", False)
-            self.watermark_x_offset = settings.get("watermark_x_offset", 0)
-            self.watermark_y_offset = settings.get("watermark_y_offset", 0)
-
-            # 加载后同步UI显示
-            self._sync_ui_after_load_settings()
+            self._apply_settings(settings)
 
             # 更新预览如果有选中的图片
             if self.current_preview_item:
                 self.update_preview_image()
 
-            messagebox.showinfo("应用模板", f"模板 '{Path(template_path).name}' 已加载")
+            messagebox.showinfo("应用模板", f"模板 '{template_name}' 已加载")
         except Exception as e:
             messagebox.showerror("应用模板", f"加载模板时出错: {e}")
 
+    def _get_template_files(self):
+        """返回模板目录下按修改时间升序排列的 JSON 文件；目录未变化时复用上次的结果"""
+        dir_mtime = self.templates_dir.stat().st_mtime_ns
+        if self._templates_index[0] != dir_mtime:
+            with os.scandir(self.templates_dir) as it:
+                entries = [(e.stat().st_mtime, Path(e.path)) for e in it
+                           if e.name.endswith(".json") and e.is_file()]
+            entries.sort(key=lambda entry: entry[0])
+            self._templates_index = (dir_mtime, [path for _, path in entries])
+        return self._templates_index[1]
+
     def load_templates(self):
         """加载模板列表"""
         try:
-            templates = sorted(self.templates_dir.glob("template_*.json"), key=os.path.getmtime)
-            return [t.name for t in templates]
+            return [t.name for t in self._get_template_files() if t.name.startswith("template_")]
         except Exception as e:
             print(f"加载模板时出错: {e}")
             return []
@@ -1343,7 +2005,7 @@ class WatermarkGUI:
         """管理模板对话框"""
         try:
             # 获取模板文件列表（返回Path对象而不是文件名）
-            template_files = sorted(self.templates_dir.glob("*.json"), key=os.path.getmtime, reverse=True)
+            template_files = self._get_template_files()[::-1]
         except Exception as e:
             print(f"加载模板时出错: {e}")
             template_files = []
@@ -1546,47 +2208,50 @@ class WatermarkGUI:
         close_button.pack(side=tk.RIGHT)
 
     def save_last_settings(self):
-        """保存当前设置到最后设置文件"""
-        try:
-            settings = {
-                "watermark_type": self.watermark_type.get(),
-                "font_size": self.font_size.get(),
-                "color": self.color.get(),
-                "text_opacity": self.text_opacity.get(),
-                "watermark_text_source": self.watermark_text_source.get(),
-                "custom_watermark_text": self.custom_watermark_text.get(),
-                "image_watermark_path": self.image_watermark_path.get(),
-                "image_opacity": self.image_opacity.get(),
-                "image_scale": self.image_scale.get(),
-                "position": self.position.get(),
-                "rotation_angle": self.rotation_angle.get(),
-                # 添加手动位置信息
-                "manual_position": self.manual_position,
-                "watermark_x_offset": self.watermark_x_offset,
-                "watermark_y_offset": self.watermark_y_offset,
-                "output_format": self.output_format.get(),
-                "output_quality": self.output_quality.get(),
-                "output_dir": self.output_dir.get(),
-                "filename_prefix": self.filename_prefix.get(),
-                "filename_suffix": self.filename_suffix.get(),
-                "resize_option": self.resize_option.get(),
-                "resize_value": self.resize_value.get(),
-            }
+        """保存当前设置到最后设置文件，与上次保存的内容相同时跳过；文件写入在后台线程进行"""
+        settings = self._collect_settings()
+        if settings == self._saved_settings:
+            return
 
-            with open(self.settings_file, "w", encoding="utf-8") as f:
-                json.dump(settings, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            print(f"保存最后设置时出错: {e}")
+        def save_thread():
+            try:
+                _write_json_atomic(self.settings_file, settings)
+                self._saved_settings = settings
+            except Exception as e:
+                print(f"保存最后设置时出错: {e}")
+
+        # 非守护线程：窗口关闭后解释器仍会等待写入完成
+        threading.Thread(target=save_thread).start()
 
     def on_closing(self):
         """处理窗口关闭事件"""
         # 保存最后的设置
         self.save_last_settings()
+        # 不再等待尚未完成的缩略图加载
+        self._loader.shutdown(wait=False)
+        self.thumb_cache.close()
         # 直接关闭程序
         self.root.destroy()
 
+def _check_pillow_build():
+    """检查 Pillow 是否启用 libjpeg-turbo / 是否为 pillow-simd，只打印提示，不影响运行"""
+    try:
+        import PIL
+        from PIL import features
+        if not features.check_feature('libjpeg_turbo'):
+            print("当前 Pillow 未使用 libjpeg-turbo，JPEG 编解码会明显变慢，建议重新安装官方 Pillow 或 pillow-simd")
+        elif 'post' not in PIL.__version__:
+            # pillow-simd 的版本号带 .postN 后缀
+            print("提示：安装 pillow-simd 可加快缩放与 JPEG 处理，详见 README 安装说明")
+    except Exception:
+        pass
+
+
 def main():
     """主函数"""
+    # PyInstaller 打包后子进程需要此调用才能正常启动
+    multiprocessing.freeze_support()
+    _check_pillow_build()
     try:
         from tkinterdnd2 import TkinterDnD
         # 如果支持，则创建支持拖拽的根窗口